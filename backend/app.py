@@ -1,4 +1,4 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 import os
 from pathlib import Path
@@ -11,9 +11,13 @@ from routes.users import users_bp
 from routes.admin import admin_bp
 from routes.submissions import submissions_bp
 from routes.courses import courses_bp 
+from utils.static_assets import StaticAssets
+
+PRODUCTION = os.getenv("FLASK_ENV") == "production"
 
 # --- Initialize Flask App ---
-app = Flask(__name__, static_folder="../frontend/dist", static_url_path="")
+# In production the build is served from memory by utils/static_assets.py instead of Flask's static route.
+app = Flask(__name__, static_folder=None if PRODUCTION else "../frontend/dist", static_url_path="")
 CORS(app, supports_credentials=True, resources={
     r"/api/*": {"origins": "*"},
     r"/api/admin/*": {"origins": "*"}
@@ -31,16 +35,14 @@ app.register_blueprint(submissions_bp, url_prefix="/api/submissions")
 app.register_blueprint(courses_bp, url_prefix="/api/courses")
 
 # --- Serve React App in Production ---
-if os.getenv("FLASK_ENV") == "production":
+if PRODUCTION:
     frontend_dist = Path(__file__).resolve().parent.parent / "frontend" / "dist"
+    static_assets = StaticAssets(frontend_dist)
 
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     def serve(path):
-        if path != "" and (frontend_dist / path).exists():
-            return send_from_directory(frontend_dist, path)
-        else:
-            return send_from_directory(frontend_dist, "index.html")
+        return static_assets.serve(path or "index.html")
 
 # --- Main entry point to run the server ---
 if __name__ == "__main__":
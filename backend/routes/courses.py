@@ -1,25 +1,19 @@
-import json
-from pathlib import Path
 from flask import Blueprint, jsonify
+from utils.course_config import COURSE_CONFIG, conditional_json
 
 # --- Flask Blueprint Setup ---
 courses_bp = Blueprint("courses", __name__)
 
-# --- Configuration ---
-BASE_DIR = Path(__file__).parent.parent
-COURSE_CONFIG_PATH = BASE_DIR / "data" / "course_config.json"
-
 
 @courses_bp.route("/", methods=["GET"])
 def get_all_courses():
     """
-    Reads the central course configuration from the JSON file and returns it.
-    This ensures the data is always fresh on every API call.
+    Returns the central course configuration. It is served from the shared
+    config cache, which the admin routes invalidate on every change; the
+    ETag lets the frontend revalidate without downloading it again.
     """
     try:
-        with open(COURSE_CONFIG_PATH, 'r', encoding='utf-8') as f:
-            courses_data = json.load(f)
-        return jsonify(courses_data)
+        return conditional_json(*COURSE_CONFIG.body("courses", lambda config: config))
     except FileNotFoundError:
         return jsonify({"message": "Course configuration file not found."}), 404
     except Exception as e:
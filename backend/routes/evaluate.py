@@ -1,24 +1,84 @@
 # backend/routes/evaluate.py
 
 import json
-import time
+import math
+import os
+import threading
 from pathlib import Path
 from datetime import datetime
-from flask import Blueprint, request, jsonify
-from typing import Dict, Tuple, Union
-from jupyter_client.manager import KernelManager, KernelClient
-from queue import Empty
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from typing import Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 import re
+from utils.ds_harness import RESULT_MARKER
+from utils.grading_pool import run_cases_in_workers
+from utils.kernel_service import create_kernel_service
+from utils.job_queue import EVAL_WORKERS, JobQueue, PRIORITY_GRADING, PRIORITY_INTERACTIVE
+from utils.kernel_registry import MAX_KERNELS
+from utils.solution_cache import SOLUTION_CACHE
+from utils.question_bank import QUESTION_BANK
+from utils import user_store
+from utils.submission_log import SUBMISSION_LOG
 
 evaluation_bp = Blueprint('evaluation_api', __name__)
 
 QUESTIONS_BASE_PATH = Path(__file__).parent.parent / "data" / "questions"
-SUBMISSIONS_PATH = Path(__file__).parent.parent / "data" / "submissions"
-USERS_FILE_PATH = Path(__file__).parent.parent / "data" / "users.json"
 USER_GENERATED_PATH = Path(__file__).parent.parent / "data" / "user_generated"
-USER_KERNELS: Dict[str, Tuple[KernelManager, KernelClient]] = {}
+BACKEND_PATH = Path(__file__).resolve().parent.parent
+# Defined in every run. The backend helpers are imported from their files on first use, under the private
+# package name _ps_utils: runs that never call them import nothing, and a student's own `utils` module is untouched.
+KERNEL_HELPERS = f"""
+def _ps_helper(module):
+    import importlib.machinery, importlib.util, sys
+    if '_ps_utils' not in sys.modules:
+        spec = importlib.machinery.ModuleSpec('_ps_utils', None, is_package=True)
+        spec.submodule_search_locations = [{json.dumps(str(BACKEND_PATH / "utils"))}]
+        sys.modules['_ps_utils'] = importlib.util.module_from_spec(spec)
+    return importlib.import_module('_ps_utils.' + module)
+def load_dataset(*args, **kwargs): return _ps_helper('dataset_cache').load_dataset(*args, **kwargs)
+def load_audio(*args, **kwargs): return _ps_helper('audio_cache').load_audio(*args, **kwargs)
+"""
+# 'kernel' grades DS code on the student's own kernel, 'workers' on separate worker interpreters.
+DS_GRADING_MODE = os.getenv("DS_GRADING_MODE", "kernel")
+# Student CSVs at least this large are compared in streamed chunks instead of fully in memory.
+CHUNKED_COMPARE_MIN_BYTES = int(os.getenv("CHUNKED_COMPARE_MIN_MB", "32")) * 1024 * 1024
+CHUNKED_COMPARE_ROWS = 50_000
+# In-process kernels, or a shared kernel broker when KERNEL_BROKER is set (see utils/kernel_service.py).
+KERNELS = create_kernel_service()
+EVAL_QUEUE = JobQueue(EVAL_WORKERS or MAX_KERNELS)
+
+class SessionNotFound(Exception):
+    """The session has no kernel (never started, ended, or evicted)."""
+
+_kernel_services_started = False
+_kernel_services_lock = threading.Lock()
+
+@evaluation_bp.before_app_request
+def _start_kernel_services():
+    # Pre-warm kernels and start the idle reaper with the first request the server handles. Not at import or
+    # blueprint registration: spawned helper processes (password hashing, upload parsing) re-run app.py.
+    global _kernel_services_started
+    if _kernel_services_started: return
+    with _kernel_services_lock:
+        if not _kernel_services_started:
+            KERNELS.start()
+            _kernel_services_started = True
+
+def _session_not_found(session_id: str, message: str = 'User session not found.') -> Tuple[dict, int]:
+    if KERNELS.eviction_reason(session_id):
+        return {'error': 'Session expired, please restart.', 'sessionExpired': True}, 410
+    return {'error': message}, 404
+
+def _job_response(job, sync_timeout: int = 300):
+    # Waits for the job unless the client asked to poll for it; returns a Flask response tuple.
+    if request.args.get('async') == '1' or (request.get_json(silent=True) or {}).get('async'):
+        return jsonify(job.to_dict()), 202
+    if not job.wait(sync_timeout):
+        return jsonify({'error': 'Evaluation is still queued or running.', **job.to_dict()}), 202
+    if job.status == 'failed': return jsonify({'error': job.error}), 500
+    payload, status = job.result
+    return jsonify(payload), status
 
 # --- HELPER FUNCTIONS ---
 def extract_and_compare_value(student_output: str, label: str, expected_value: float, tolerance: float) -> Tuple[bool, str]:
@@ -44,6 +104,109 @@ def check_keywords_in_text(student_output: str, keywords_str: str, threshold: fl
         missing = [kw for kw in keywords if kw not in student_output_lower]
         return False, f"Failed. Missing keywords: {missing}"
 
+def _corner_similarity(df_student: pd.DataFrame, df_solution: pd.DataFrame, threshold: float, tolerance: float) -> float:
+    """Fallback score for mismatched shapes: compares the numeric cells of the top-left corner only."""
+    print("DEBUG: Performing partial comparison on the top-left corner as a fallback.")
+
+    # Determine the size of the comparison grid (up to 5x5)
+    min_rows = min(df_student.shape[0], df_solution.shape[0], 5)
+    min_cols = min(df_student.shape[1], df_solution.shape[1], 5)
+
+    if min_rows == 0 or min_cols == 0:
+        print("DEBUG: Cannot perform partial comparison on empty or single-dimension data.")
+        return 0.0
+
+    # Slice the dataframes to the smaller intersection
+    student_subset = df_student.iloc[:min_rows, :min_cols]
+    solution_subset = df_solution.iloc[:min_rows, :min_cols]
+
+    # Compare only the numeric columns within this subset
+    numeric_cols = solution_subset.select_dtypes(include=np.number).columns
+    valid_cols = [col for col in numeric_cols if col in student_subset.columns]
+
+    if not valid_cols:
+        print("DEBUG: No common numeric columns in the top-left corner to compare.")
+        return 0.0
+
+    student_numeric_subset = student_subset[valid_cols]
+    solution_numeric_subset = solution_subset[valid_cols]
+
+    # Perform the tolerant comparison
+    matches = np.isclose(student_numeric_subset.values, solution_numeric_subset.values, atol=tolerance).sum()
+    total_cells = student_numeric_subset.size
+
+    similarity_score = matches / total_cells if total_cells > 0 else 0.0
+    print(f"DEBUG: Partial comparison score: {similarity_score:.2f} (Threshold: {threshold})")
+    return similarity_score
+
+def _count_csv_rows(path: Path) -> int:
+    # Data rows without parsing: newline count minus the header. Assumes no quoted newlines,
+    # which holds for the numeric outputs this is used on; a wrong count only disables early exit.
+    lines, last_byte = 0, b"\n"
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n"); last_byte = block[-1:]
+    if last_byte != b"\n": lines += 1
+    return max(lines - 1, 0)
+
+def _chunked_similarity(student_path: Path, solution_path: Path, key_columns, threshold: float, tolerance: float) -> Optional[float]:
+    """
+    Streaming counterpart of compare_csvs for large student outputs. Returns
+    None whenever the result could differ from the in-memory comparison, in
+    which case the caller falls back to it.
+
+    With key_columns, the student file is read in chunks and each chunk is
+    merged against the solution; an inner merge distributes over row chunks,
+    so the running totals equal those of the full merge. Without them, the
+    student file is read in chunks and compared against the cached
+    solution's numeric block, which is typed from the whole file. The
+    comparison stops as soon as the threshold is out of reach, returning a
+    lower bound of the score that fails either way. Passing outputs are
+    always read to the end, since a later non-numeric cell makes the
+    in-memory comparison fail.
+    """
+    solution = SOLUTION_CACHE.get(solution_path)
+    if key_columns and len(key_columns) == 2:
+        merge_key, compare_col = key_columns
+        df_solution = solution.frame
+        student_columns = pd.read_csv(student_path, nrows=0).columns
+        if merge_key not in student_columns or merge_key not in df_solution.columns: return 0.0
+        if compare_col not in student_columns or compare_col not in df_solution.columns: return 0.0
+        solution_part = df_solution[[merge_key, compare_col]]
+        matches, total = 0, 0
+        with pd.read_csv(student_path, usecols=[merge_key, compare_col], chunksize=CHUNKED_COMPARE_ROWS) as reader:
+            for chunk in reader:
+                chunk[merge_key] = chunk[merge_key].astype(df_solution[merge_key].dtype)
+                merged = pd.merge(chunk, solution_part, on=merge_key, suffixes=('_student', '_solution'))
+                matches += np.isclose(merged[f'{compare_col}_student'], merged[f'{compare_col}_solution'], atol=tolerance).sum()
+                total += len(merged)
+        return (matches / total) if total > 0 else 1.0
+
+    student_rows = _count_csv_rows(student_path)
+    student_columns = pd.read_csv(student_path, nrows=0).columns
+    if (student_rows, len(student_columns)) != solution.frame.shape:
+        print(f"DEBUG: Shape mismatch. Student: {(student_rows, len(student_columns))}, Solution: {solution.frame.shape}")
+        return _corner_similarity(pd.read_csv(student_path, nrows=5), solution.frame, threshold, tolerance)
+
+    numeric_cols, solution_numeric = solution.numeric_columns, solution.numeric_values
+    # Text-only solutions are compared with DataFrame.equals, which needs the full frames.
+    if len(numeric_cols) == 0 or not set(numeric_cols) <= set(student_columns): return None
+    total, offset, matches = len(numeric_cols) * len(solution_numeric), 0, 0
+    if total == 0: return None
+    try:
+        with pd.read_csv(student_path, usecols=list(numeric_cols), chunksize=CHUNKED_COMPARE_ROWS) as reader:
+            for chunk in reader:
+                expected = solution_numeric[offset:offset + len(chunk)]
+                if len(expected) != len(chunk): return None
+                matches += np.isclose(chunk[numeric_cols].to_numpy(), expected, atol=tolerance).sum()
+                offset += len(chunk)
+                if (matches + total - offset * len(numeric_cols)) / total < threshold:
+                    print(f"DEBUG: Streamed comparison stopped early after {offset} of {len(solution_numeric)} rows.")
+                    return matches / total
+    except (TypeError, ValueError):
+        return None  # A non-numeric student cell; the in-memory comparison reports it.
+    return matches / total if offset == len(solution_numeric) else None
+
 def compare_csvs(student_path: Union[Path, str], solution_path: Union[Path, str], key_columns=None, threshold: float = 0.9, tolerance: float = 1e-5) -> Tuple[bool, float]:
     try:
         student_path, solution_path = Path(student_path), Path(solution_path)
@@ -53,13 +216,36 @@ def compare_csvs(student_path: Union[Path, str], solution_path: Union[Path, str]
         if not solution_path.exists():
             print(f"DEBUG: Solution file does not exist at {solution_path}")
             return False, 0.0
+
+        keyed = bool(key_columns and len(key_columns) == 2)
+        fingerprint = SOLUTION_CACHE.fingerprint(solution_path, key_columns[0] if keyed else None)
+        if fingerprint and fingerprint.self_match_is_perfect(key_columns) and fingerprint.identical_to(student_path):
+            # Byte-identical to the solution: the full comparison is known to score 1.0.
+            print("DEBUG: Student file is byte-identical to the solution.")
+            return 1.0 >= threshold, 1.0
+
+        if student_path.stat().st_size >= CHUNKED_COMPARE_MIN_BYTES:
+            streamed_score = _chunked_similarity(student_path, solution_path, key_columns, threshold, tolerance)
+            if streamed_score is not None:
+                print(f"DEBUG: Streamed comparison score: {streamed_score:.2f} (Threshold: {threshold})")
+                return streamed_score >= threshold, streamed_score
         
         df_student = pd.read_csv(student_path)
-        df_solution = pd.read_csv(solution_path)
         
         similarity_score = 0.0
 
-        if key_columns and len(key_columns) == 2:
+        if keyed and fingerprint and fingerprint.key_index(key_columns[0]) is not None and fingerprint.column(key_columns[1]) is not None \
+                and key_columns[0] != key_columns[1]:
+            # Same result as the merge below, looked up in the prebuilt sorted key index (the key is unique).
+            merge_key, compare_col = key_columns
+            if merge_key not in df_student.columns or compare_col not in df_student.columns: return False, 0.0
+            keys = df_student[merge_key].astype(fingerprint.meta["dtypes"][merge_key]).to_numpy()
+            found, solution_rows = fingerprint.lookup(merge_key, keys)
+            col_student, col_solution = df_student[compare_col].to_numpy()[found], fingerprint.column(compare_col)[solution_rows]
+            matches = np.isclose(col_student, col_solution, atol=tolerance).sum()
+            similarity_score = (matches / len(col_solution)) if len(col_solution) > 0 else 1.0
+        elif keyed:
+            df_solution = SOLUTION_CACHE.get(solution_path).frame
             merge_key, compare_col = key_columns
             if merge_key not in df_student.columns or merge_key not in df_solution.columns: return False, 0.0
             if compare_col not in df_student.columns or compare_col not in df_solution.columns: return False, 0.0
@@ -69,57 +255,32 @@ def compare_csvs(student_path: Union[Path, str], solution_path: Union[Path, str]
             matches = np.isclose(col_student, col_solution, atol=tolerance).sum()
             similarity_score = (matches / len(col_solution)) if len(col_solution) > 0 else 1.0
         else:
+            # The fingerprint answers shape and numeric questions without touching the solution CSV.
+            solution_shape = fingerprint.shape if fingerprint else SOLUTION_CACHE.get(solution_path).frame.shape
             # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
             # START OF MODIFIED SECTION
             # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
-            if df_student.shape != df_solution.shape:
-                print(f"DEBUG: Shape mismatch. Student: {df_student.shape}, Solution: {df_solution.shape}")
-                print("DEBUG: Performing partial comparison on the top-left corner as a fallback.")
-
-                # Determine the size of the comparison grid (up to 5x5)
-                min_rows = min(df_student.shape[0], df_solution.shape[0], 5)
-                min_cols = min(df_student.shape[1], df_solution.shape[1], 5)
-
-                if min_rows == 0 or min_cols == 0:
-                    print("DEBUG: Cannot perform partial comparison on empty or single-dimension data.")
-                    return False, 0.0
-
-                # Slice the dataframes to the smaller intersection
-                student_subset = df_student.iloc[:min_rows, :min_cols]
-                solution_subset = df_solution.iloc[:min_rows, :min_cols]
-                
-                # Compare only the numeric columns within this subset
-                numeric_cols = solution_subset.select_dtypes(include=np.number).columns
-                valid_cols = [col for col in numeric_cols if col in student_subset.columns]
-                
-                if not valid_cols:
-                    print("DEBUG: No common numeric columns in the top-left corner to compare.")
-                    return False, 0.0
-
-                student_numeric_subset = student_subset[valid_cols]
-                solution_numeric_subset = solution_subset[valid_cols]
-
-                # Perform the tolerant comparison
-                matches = np.isclose(student_numeric_subset.values, solution_numeric_subset.values, atol=tolerance).sum()
-                total_cells = student_numeric_subset.size
-                
-                similarity_score = matches / total_cells if total_cells > 0 else 0.0
-                print(f"DEBUG: Partial comparison score: {similarity_score:.2f} (Threshold: {threshold})")
-
-            # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
+            if df_student.shape != solution_shape:
+                print(f"DEBUG: Shape mismatch. Student: {df_student.shape}, Solution: {solution_shape}")
+                similarity_score = _corner_similarity(df_student, SOLUTION_CACHE.get(solution_path).frame, threshold, tolerance)
+
+            # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
             # END OF MODIFIED SECTION
-            # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
+            # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
             else:
                 # This is the original logic for when shapes match perfectly. It remains unchanged.
-                numeric_cols = df_solution.select_dtypes(include=np.number).columns
+                if fingerprint:
+                    numeric_cols, solution_numeric = fingerprint.numeric_columns, fingerprint.numeric
+                else:
+                    solution = SOLUTION_CACHE.get(solution_path)
+                    numeric_cols, solution_numeric = solution.numeric_columns, solution.numeric_values
                 if len(numeric_cols) == 0:
-                    is_equal = df_student.equals(df_solution)
+                    is_equal = df_student.equals(SOLUTION_CACHE.get(solution_path).frame)
                     similarity_score = 1.0 if is_equal else 0.0
                 else:
                     student_numeric = df_student[numeric_cols]
-                    solution_numeric = df_solution[numeric_cols]
                     matches = np.isclose(student_numeric, solution_numeric, atol=tolerance).sum()
-                    total_numeric_cells = len(numeric_cols) * df_solution.shape[0]
+                    total_numeric_cells = len(numeric_cols) * solution_shape[0]
                     similarity_score = matches / total_numeric_cells if total_numeric_cells > 0 else 1.0
 
         final_pass_status = similarity_score >= threshold
@@ -135,7 +296,7 @@ def compare_csvs(student_path: Union[Path, str], solution_path: Union[Path, str]
         print(f"ERROR during CSV comparison: {e}"); return False, 0.0   
 # ------------------------------------------------
 
-def run_code_on_kernel(kc: KernelClient, code: str, user_input: str = "", working_dir: str = None, timeout: int = 45) -> Tuple[str, str]:
+def build_run_script(code: str, user_input: str = "", working_dir: str = None) -> str:
     prep_script = ""
     if working_dir:
         Path(working_dir).mkdir(parents=True, exist_ok=True)
@@ -144,6 +305,7 @@ def run_code_on_kernel(kc: KernelClient, code: str, user_input: str = "", workin
 
     full_script = f"""
 {prep_script}
+{KERNEL_HELPERS}
 import builtins
 _input_lines = {json.dumps(user_input)}.splitlines()
 _input_lines.reverse()
@@ -153,36 +315,57 @@ def _mock_input(prompt=''):
 builtins.input = _mock_input
 {code}
 """
-    msg_id = kc.execute(full_script); stdout, stderr = [], []; start_time = time.monotonic()
-    while time.monotonic() - start_time < timeout:
-        try:
-            msg = kc.get_iopub_msg(timeout=1)
-            if msg.get('parent_header', {}).get('msg_id') != msg_id: continue
-            msg_type = msg['header']['msg_type']
-            content = msg.get('content', {})
-            if msg_type == 'stream':
-                if content['name'] == 'stdout': stdout.append(content['text'])
-                else: stderr.append(content['text'])
-            elif msg_type == 'error': stderr.append('\\n'.join(content.get('traceback', [])))
-            elif msg_type == 'status' and content.get('execution_state') == 'idle': break
-        except Empty: pass
-    else: stderr.append(f"\\n[Kernel Timeout] Execution exceeded {timeout} seconds.")
-    return "".join(stdout).strip(), "".join(stderr).strip()
+    return full_script
+
+def run_code_on_kernel(session_id: str, code: str, user_input: str = "", working_dir: str = None, timeout: int = 45) -> Tuple[str, str]:
+    output = KERNELS.execute(session_id, build_run_script(code, user_input, working_dir), timeout)
+    if output is None: raise SessionNotFound(session_id)
+    return output
+
+def run_test_cases_on_kernel(session_id: str, code: str, test_cases: list, case_timeout: int = 45) -> list:
+    """
+    Runs all test cases of a DS question in a single kernel execution using
+    utils.ds_harness. Each case gets its own stdin, captured output and timing;
+    the whole result vector comes back on one marked stdout line. The
+    execution may take `case_timeout` seconds per case.
+    """
+    harness_script = f"""
+import json as _json
+print({json.dumps(RESULT_MARKER)} + _json.dumps(_ps_helper('ds_harness').run_cases({json.dumps(code)}, {json.dumps(test_cases)}, dict(globals()))))
+"""
+    stdout, stderr = run_code_on_kernel(session_id, harness_script, timeout=case_timeout * max(1, len(test_cases)))
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(RESULT_MARKER): return json.loads(line[len(RESULT_MARKER):])
+    error = stderr or "The test harness returned no results."
+    return [{"stdout": "", "stderr": error, "time": 0.0, "passed": False} for _ in test_cases]
 
 @evaluation_bp.route('/session/start', methods=['POST'])
 def start_session():
     data = request.get_json(); session_id = data.get('sessionId')
     if not session_id: return jsonify({'error': 'sessionId is required.'}), 400
-    if session_id in USER_KERNELS: return jsonify({'message': f'Session {session_id} already exists.'})
     try:
-        km = KernelManager(); km.start_kernel()
-        kc = km.client(); kc.start_channels(); kc.wait_for_ready(timeout=60)
-        USER_KERNELS[session_id] = (km, kc)
+        if not KERNELS.start_session(session_id): return jsonify({'message': f'Session {session_id} already exists.'})
         return jsonify({'message': f'Session {session_id} started successfully.'})
     except Exception as e:
-        if 'km' in locals() and km.is_alive(): km.shutdown_kernel()
         return jsonify({'error': 'The code execution engine failed to start.', 'details': str(e)}), 500
 
+@evaluation_bp.route('/stats', methods=['GET'])
+def get_engine_stats():
+    return jsonify({**KERNELS.stats(), 'jobs': EVAL_QUEUE.stats(), 'solution_cache': SOLUTION_CACHE.stats()})
+
+@evaluation_bp.route('/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Result of an evaluation job; `?wait=<seconds>` long-polls until it finishes."""
+    try:
+        wait = float(request.args.get('wait', 0))
+        if not math.isfinite(wait): raise ValueError(wait)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds.'}), 400
+    # Any worker can answer: jobs accepted by another one are read from the database.
+    status = EVAL_QUEUE.status(job_id, min(max(wait, 0), 30))
+    if not status: return jsonify({'error': f'Job {job_id} not found or expired.'}), 404
+    return jsonify(status)
+
 @evaluation_bp.route('/validate', methods=['POST'])
 def validate_cell():
     data = request.get_json()
@@ -190,36 +373,43 @@ def validate_cell():
 
     if not all([session_id, subject, level, q_id, code, username]): return jsonify({'error': 'Missing required fields'}), 400
     if not code.strip(): return jsonify({'error': 'Code cannot be empty.'}), 400
-    if session_id not in USER_KERNELS: return jsonify({'error': 'User session not found.'}), 404
-    
-    _km, kc = USER_KERNELS[session_id]
+    if not KERNELS.has_session(session_id):
+        payload, status = _session_not_found(session_id)
+        return jsonify(payload), status
+
+    job = EVAL_QUEUE.submit('validate', lambda: _grade_session(session_id, data), PRIORITY_GRADING)
+    return _job_response(job)
+
+def _grade_session(session_id: str, data: dict) -> Tuple[dict, int]:
+    try:
+        return _grade_cell(session_id, data)
+    except SessionNotFound:
+        return _session_not_found(session_id)
+
+def _grade_cell(session_id: str, data: dict) -> Tuple[dict, int]:
+    subject, level, q_id, p_id, code, username = data.get('subject'), data.get('level'), data.get('questionId'), data.get('partId'), data.get('cellCode'), data.get('username')
     student_dir = USER_GENERATED_PATH / username
 
     try:
         q_path = QUESTIONS_BASE_PATH / subject / f"level{level}" / "questions.json"
-        with open(q_path, 'r', encoding='utf-8') as f: all_q = json.load(f)
-        q_data = next((q for q in all_q if q['id'] == q_id), None)
-        if not q_data: return jsonify({'error': f'Question with ID {q_id} not found.'}), 404
-        part_data = next((p for p in q_data.get('parts', []) if p['part_id'] == p_id), q_data) if p_id else q_data
-    except FileNotFoundError: return jsonify({'error': f"Question file not found at path: {q_path}"}), 500
-    except Exception as e: return jsonify({'error': f'Could not load question data: {str(e)}'}), 500
+        q_data, part_data = QUESTION_BANK.find(subject, level, q_id, p_id)
+        if not q_data: return {'error': f'Question with ID {q_id} not found.'}, 404
+    except FileNotFoundError: return {'error': f"Question file not found at path: {q_path}"}, 500
+    except Exception as e: return {'error': f'Could not load question data: {str(e)}'}, 500
 
     test_results = []
     
     if subject == 'ds':
         test_cases = q_data.get("test_cases", [])
-        if not test_cases: return jsonify({'error': f'No test cases found for question {q_id}.'}), 500
-        for i, case in enumerate(test_cases):
-            user_input = case.get("input", "")
-            stdout, stderr = run_code_on_kernel(kc, code, user_input=user_input)
-            if stderr:
-                test_results.append(False)
-                continue
-            passed = stdout.strip() == case.get("output", "").strip()
-            test_results.append(passed)
+        if not test_cases: return {'error': f'No test cases found for question {q_id}.'}, 500
+        if data.get('gradingMode', DS_GRADING_MODE) == 'workers':
+            case_results = run_cases_in_workers(code, test_cases, stop_on_failure=bool(data.get('stopOnFailure')))
+        else:
+            case_results = run_test_cases_on_kernel(session_id, code, test_cases)
+        test_results.extend(bool(result["passed"]) for result in case_results)
             
     elif subject == 'ml':
-        stdout, stderr = run_code_on_kernel(kc, code, working_dir=student_dir)
+        stdout, stderr = run_code_on_kernel(session_id, code, working_dir=student_dir)
         if stderr:
             print(f"  - ERROR: Student code failed to execute.\n{stderr}")
             test_results.append(False)
@@ -262,11 +452,11 @@ def validate_cell():
             if not student_match:
                 print("  - FAILED: Could not find a .wav file path in the student's code.")
                 # Return immediately with a clear error for the student.
-                return jsonify({
+                return {
                     "test_results": [False], 
                     "stdout": "", 
                     "stderr": "Validation Error: Your code must contain the full path to the input .wav file as a string (e.g., \"/path/to/Audio36.wav\")."
-                })
+                }, 200
 
             student_path_str = student_match.group(1)
             student_filename = Path(student_path_str).name
@@ -275,11 +465,11 @@ def validate_cell():
             if student_filename != expected_filename:
                 print(f"  - FAILED: Input file mismatch. Expected '{expected_filename}', but code uses '{student_filename}'.")
                 # Return immediately with a clear error for the student.
-                return jsonify({
+                return {
                     "test_results": [False], 
                     "stdout": "", 
                     "stderr": f"Validation Error: Incorrect input file. The prompt requires you to use '{expected_filename}', but your code uses '{student_filename}'."
-                })
+                }, 200
         
         # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
         # END OF ADDED VALIDATION LOGIC
@@ -287,11 +477,11 @@ def validate_cell():
         # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
 
         # --- Original Logic Starts Here ---
-        stdout, stderr = run_code_on_kernel(kc, code, working_dir=student_dir)
+        stdout, stderr = run_code_on_kernel(session_id, code, working_dir=student_dir)
         if stderr:
             print(f"  - ERROR: Student code failed to execute.\n{stderr}")
             # It's better to pass stderr to the frontend for debugging.
-            return jsonify({"test_results": [False], "stdout": stdout, "stderr": stderr})
+            return {"test_results": [False], "stdout": stdout, "stderr": stderr}, 200
         else:
             # Speech Rec logic, which does NOT use key_columns
             solution_files = part_data.get("solution_file")
@@ -315,9 +505,9 @@ def validate_cell():
             else:
                 test_results.append(False)
     else:
-        return jsonify({'error': f"No validation logic defined for subject: '{subject}'"}), 400
+        return {'error': f"No validation logic defined for subject: '{subject}'"}, 400
 
-    return jsonify({"test_results": test_results})
+    return {"test_results": test_results}, 200
 
 @evaluation_bp.route('/run', methods=['POST'])
 def run_cell():
@@ -327,15 +517,51 @@ def run_cell():
         return jsonify({'error': 'Session ID, code, and username are required.'}), 400
     if not student_code.strip():
         return jsonify({'stdout': '', 'stderr': 'Cannot run empty code.'})
-    if session_id not in USER_KERNELS:
-        return jsonify({'error': 'User session not found or invalid.'}), 404
-    _km, kc = USER_KERNELS[session_id]
+    if not KERNELS.has_session(session_id):
+        payload, status = _session_not_found(session_id, 'User session not found or invalid.')
+        return jsonify(payload), status
     student_dir = USER_GENERATED_PATH / username
+    job = EVAL_QUEUE.submit('run', lambda: _run_session(session_id, student_code, user_input, student_dir), PRIORITY_INTERACTIVE)
+    return _job_response(job)
+
+def _run_session(session_id: str, student_code: str, user_input: str, student_dir: Path) -> Tuple[dict, int]:
     try:
-        stdout, stderr = run_code_on_kernel(kc, student_code, user_input=user_input, working_dir=student_dir)
-        return jsonify({'stdout': stdout, 'stderr': stderr})
+        stdout, stderr = run_code_on_kernel(session_id, student_code, user_input=user_input, working_dir=student_dir)
+        return {'stdout': stdout, 'stderr': stderr}, 200
+    except SessionNotFound:
+        return _session_not_found(session_id, 'User session not found or invalid.')
     except Exception as e: 
-        return jsonify({'stdout': '', 'stderr': str(e)}), 500
+        return {'stdout': '', 'stderr': str(e)}, 500
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@evaluation_bp.route('/run/stream', methods=['POST'])
+def run_cell_stream():
+    """
+    Streaming variant of /run. Sends `stream` and `error` events as
+    Server-Sent Events while the kernel produces them, then one final
+    `status` event ('ok', 'error' or 'timeout').
+    """
+    data = request.get_json()
+    session_id, student_code, user_input, username = data.get('sessionId'), data.get('cellCode', 'pass'), data.get('userInput', ''), data.get('username')
+    if not all([session_id, student_code, username]):
+        return jsonify({'error': 'Session ID, code, and username are required.'}), 400
+    if not KERNELS.has_session(session_id):
+        payload, status = _session_not_found(session_id, 'User session not found or invalid.')
+        return jsonify(payload), status
+    full_script = build_run_script(student_code, user_input, USER_GENERATED_PATH / username)
+    timeout = 45
+
+    def generate():
+        for event, payload in KERNELS.stream(session_id, full_script, timeout):
+            if event == 'keepalive': yield ": keep-alive\n\n"
+            elif event == 'status' and payload['status'] == 'expired':
+                yield _sse_event('status', {'status': 'error', 'message': 'Session expired, please restart.'})
+            else: yield _sse_event(event, payload)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @evaluation_bp.route('/submit', methods=['POST'])
 def submit_answers():
@@ -344,26 +570,8 @@ def submit_answers():
     answers, all_passed = data.get('answers', []), all(ans.get('passed', False) for ans in data.get('answers', []))
     status = 'passed' if all_passed else 'failed'
     submission = { 'subject': subject, 'level': f"level{level}", 'status': status, 'timestamp': datetime.now().isoformat(), 'answers': answers }
-    user_submission_file = SUBMISSIONS_PATH / f"{username}.json"
-    try:
-        with open(user_submission_file, 'r+', encoding='utf-8') as f:
-            user_submissions = json.load(f); user_submissions.append(submission); f.seek(0); json.dump(user_submissions, f, indent=2)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(user_submission_file, 'w', encoding='utf-8') as f: json.dump([submission], f, indent=2)
+    SUBMISSION_LOG.append(username, submission)
     updated_user = None
-    if all_passed:
-        with open(USERS_FILE_PATH, 'r+', encoding='utf-8') as f:
-            users_json = json.load(f)
-            user = next((u for u in users_json['users'] if u['username'] == username), None)
-            if user:
-                if subject not in user['progress']: user['progress'][subject] = {}
-                user['progress'][subject][f"level{level}"] = 'completed'
-                next_level = f"level{int(level) + 1}"
-                if user['progress'][subject].get(next_level) == 'locked': user['progress'][subject][next_level] = 'unlocked'
-                updated_user = {k: v for k, v in user.items() if k != 'password'}
-            f.seek(0); json.dump(users_json, f, indent=2); f.truncate()
-    if session_id in USER_KERNELS:
-        km, kc = USER_KERNELS.pop(session_id)
-        if kc.is_alive(): kc.stop_channels()
-        if km.is_alive(): km.shutdown_kernel()
+    if all_passed: updated_user = user_store.complete_level(username, subject, level)
+    KERNELS.end_session(session_id)
     return jsonify({'success': True, 'message': "Submission received.", 'updatedUser': updated_user})
\ No newline at end of file
@@ -2,8 +2,11 @@
 
 import json
 from pathlib import Path
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response
 import random
+from utils.question_bank import QUESTION_BANK
+from utils.question_store import QUESTION_STORE
+from utils.course_config import COURSE_CONFIG, conditional_json
 
 # --- Flask Blueprint Setup ---
 questions_bp = Blueprint('questions_api', __name__)
@@ -11,23 +14,20 @@ questions_bp = Blueprint('questions_api', __name__)
 # --- Configuration ---
 BASE_DIR = Path(__file__).parent.parent
 QUESTIONS_BASE_PATH = BASE_DIR / "data" / "questions"
-COURSE_CONFIG_PATH = BASE_DIR / "data" / "course_config.json"
 
 # --- Routes ---
 
 @questions_bp.route('/', methods=['GET'])
 def get_all_subjects_and_levels():
     """
-    GET all subjects and their levels from the central course_config.json file.
+    GET all subjects and their levels from the central course_config.json file
+    (cached; supports If-None-Match).
     """
     try:
-        with open(COURSE_CONFIG_PATH, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        structure = {
+        return conditional_json(*COURSE_CONFIG.body("structure", lambda config: {
             subject: details.get("levels", [])
             for subject, details in config.items() if isinstance(details, dict)
-        }
-        return jsonify(structure), 200
+        }))
     except Exception as e:
         print(f"Error fetching question structure: {e}")
         return jsonify({"message": "Failed to fetch question structure."}), 500
@@ -46,15 +46,15 @@ def get_questions_for_level(subject, level):
         # The old if/else logic has been removed.
         questions_file_path = QUESTIONS_BASE_PATH / subject / level_name / "questions.json"
 
-        with open(questions_file_path, 'r', encoding='utf-8') as f:
-            all_questions = json.load(f)
+        # Parsed and pre-serialized once per file version; see utils/question_bank.py.
+        bank = QUESTION_BANK.level(subject, level)
+        total = len(bank.questions)
 
-        if not all_questions:
+        if not total:
             return jsonify([]), 200
 
         # --- Load the course config to get the question limit ---
-        with open(COURSE_CONFIG_PATH, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = COURSE_CONFIG.get()
 
         # Correctly read the level-specific limit from the config object
         limit = config.get(subject, {}).get('question_limit', {}).get(level_name)
@@ -62,14 +62,14 @@ def get_questions_for_level(subject, level):
         # For ML, the limit is the number of projects (usually 1)
         # For other subjects, it's the number of questions to sample.
         if limit and isinstance(limit, int) and limit > 0:
-            if len(all_questions) > limit:
-                selected_questions = random.sample(all_questions, limit)
-                print(f"Sampled {limit} of {len(all_questions)} questions for {subject}/{level_name}.")
-                return jsonify(selected_questions), 200
+            if total > limit:
+                selected = random.sample(bank.serialized, limit)
+                print(f"Sampled {limit} of {total} questions for {subject}/{level_name}.")
+                return Response("[" + ",".join(selected) + "]", status=200, mimetype='application/json')
         
         # If no limit is set, or if the limit is >= the number of questions, return all
-        print(f"Returning all {len(all_questions)} questions for {subject}/{level_name}.")
-        return jsonify(all_questions), 200
+        print(f"Returning all {total} questions for {subject}/{level_name}.")
+        return Response(bank.payload, status=200, mimetype='application/json')
 
     except FileNotFoundError:
         print(f"Question file not found for {subject}/{level_name} at path: {questions_file_path}")
@@ -92,27 +92,19 @@ def add_new_question():
     if not all([subject, level, new_question, new_question.get('id')]):
         return jsonify({"message": "Subject, level, and question data with an ID are required."}), 400
 
-    # This path is also corrected to match the universal structure
-    file_path = QUESTIONS_BASE_PATH / subject / f"level{level}" / "questions.json"
-
     try:
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        questions = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
+            existing = QUESTION_BANK.level(subject, level).by_id
         except (FileNotFoundError, json.JSONDecodeError):
-            pass
-        
-        if any(q.get('id') == new_question.get('id') for q in questions):
+            existing = {}
+        if new_question.get('id') in existing:
             return jsonify({"message": f"Question with ID '{new_question['id']}' already exists."}), 409
 
-        questions.append(new_question)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(questions, f, indent=2)
+        # Appends to questions.json in place and records the new question's version.
+        QUESTION_STORE.upsert(subject, level, [new_question], remove_missing=False)
 
         return jsonify({"message": "Question added successfully."}), 201
 
     except Exception as e:
         print(f"Error uploading question: {e}")
-        return jsonify({"message": "Failed to upload question."}), 500
\ No newline at end of file
+        return jsonify({"message": "Failed to upload question."}), 500
@@ -1,76 +1,47 @@
-import json
-from pathlib import Path
 from flask import Blueprint, jsonify, request
-import os
+from utils.submission_log import SUBMISSION_LOG
+from utils.submission_index import SUBMISSION_INDEX
+from utils.paging import parse_fields, parse_sort
 
 # --- Flask Blueprint Setup ---
 submissions_bp = Blueprint("submissions", __name__)
 
 # --- Configuration ---
-BASE_DIR = Path(__file__).parent.parent
-# CORRECTED: Point to the correct 'submissions' directory
-SUBMISSIONS_PATH = BASE_DIR / "data" / "submissions"
-SUBMISSIONS_PATH.mkdir(parents=True, exist_ok=True)  # Ensure base folder exists
+SUBMISSION_FIELDS = ("subject", "level", "status", "timestamp", "answers")
 
 # --- Routes ---
 
+@submissions_bp.before_app_request
+def _open_submission_index():
+    # Must follow appends from the first request on; opening it at import would also run in spawned helper processes.
+    SUBMISSION_INDEX.open()
+
+
 @submissions_bp.route("/", methods=["GET"])
 def get_aggregated_submissions():
     """
     GET all submissions, aggregated and grouped by subject and level.
     This is for the "Aggregate View" in the admin dashboard.
-    """
-    aggregated = {}
-    if not SUBMISSIONS_PATH.exists():
-        return jsonify({}), 200
 
+    With any of subject, level, status, from, to, limit or cursor it instead
+    returns one page of matching submissions, newest first:
+    {"items": [...], "nextCursor": "..."}. `summary=1` returns only the
+    number of submissions per subject and level.
+    """
+    args = request.args
     try:
-        # CORRECTED: Loop through each JSON file directly in the 'submissions' folder
-        for user_file in SUBMISSIONS_PATH.glob("*.json"):
-            if not user_file.is_file():
-                continue
-
-            # CORRECTED: Get username from the filename (e.g., 'student1.json' -> 'student1')
-            username = user_file.stem
-
-            # Skip if file is empty
-            if os.path.getsize(user_file) == 0:
-                continue
-
-            with open(user_file, "r", encoding="utf-8") as f:
-                try:
-                    user_submissions = json.load(f)
-                except json.JSONDecodeError:
-                    print(f"Warning: Skipping malformed JSON file for {username}")
-                    continue
-
-                # The rest of your aggregation logic is correct
-                for sub in user_submissions:
-                    subject = sub.get("subject")
-                    level = sub.get("level")
-
-                    if not subject or not level:
-                        continue
-
-                    subject_group = aggregated.setdefault(subject, {})
-                    level_list = subject_group.setdefault(level, [])
-
-                    level_list.append(
-                        {
-                            "username": username,
-                            "status": sub.get("status", "unknown"),
-                            "timestamp": sub.get("timestamp"),
-                        }
-                    )
-
-        # Sort by latest timestamp
-        for subject in aggregated:
-            for level in aggregated[subject]:
-                aggregated[subject][level].sort(
-                    key=lambda s: s.get("timestamp", ""), reverse=True
-                )
-
-        return jsonify(aggregated)
+        if args.get("summary") == "1":
+            return jsonify(SUBMISSION_INDEX.summary())
+        if not any(key in args for key in ("subject", "level", "status", "from", "to", "limit", "cursor")):
+            return jsonify(SUBMISSION_INDEX.aggregated())
+
+        return jsonify(SUBMISSION_INDEX.page(
+            subject=args.get("subject"), level=args.get("level"), status=args.get("status"),
+            since=args.get("from"), until=args.get("to"),
+            limit=args.get("limit", type=int), cursor=args.get("cursor"),
+        ))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching and aggregating submissions: {e}")
         return jsonify({"message": "Failed to fetch submissions."}), 500
@@ -80,25 +51,30 @@ def get_aggregated_submissions():
 def get_student_submissions(username):
     """
     GET all submissions for a specific student for the "Student View".
-    """
-    # CORRECTED: Build the path directly to the user's JSON file
-    student_file_path = SUBMISSIONS_PATH / f"{username}.json"
-
-    # If missing or empty, return a proper 404 error
-    if not student_file_path.exists():
-        return jsonify({"message": f"Submissions for user '{username}' not found."}), 404
-        
-    if os.path.getsize(student_file_path) == 0:
-        return jsonify([]), 200
 
+    With any of fields, since, sort, limit or cursor it returns one page,
+    {"items": [...], "nextCursor": "..."}; `fields=subject,level,status`
+    leaves out the answer payloads and `sort=-timestamp` lists newest first.
+    """
+    args = request.args
     try:
-        with open(student_file_path, "r", encoding="utf-8") as f:
-            submissions = json.load(f)
-        return jsonify(submissions)
-
-    except json.JSONDecodeError:
-        print(f"Error: Malformed JSON in file for user {username}")
-        return jsonify({"message": "Failed to parse student submission data."}), 500
+        if not any(key in args for key in ("fields", "since", "sort", "limit", "cursor")):
+            submissions = SUBMISSION_LOG.read(username)
+            if submissions is None:
+                return jsonify({"message": f"Submissions for user '{username}' not found."}), 404
+            return jsonify(submissions)
+
+        _sort, descending = parse_sort(args.get("sort"), ("timestamp",), "timestamp")
+        page = SUBMISSION_INDEX.user_page(
+            username, fields=parse_fields(args.get("fields"), SUBMISSION_FIELDS), since=args.get("since"),
+            descending=descending, limit=args.get("limit", type=int), cursor=args.get("cursor"),
+        )
+        if page is None:
+            return jsonify({"message": f"Submissions for user '{username}' not found."}), 404
+        return jsonify(page)
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching submissions for user {username}: {e}")
         return jsonify({"message": "Failed to fetch student submissions."}), 500
@@ -110,7 +86,7 @@ def get_student_submissions(username):
 def add_submission():
     """
     POST a new submission for a student.
-    Saves submission data into data/submissions/<username>.json
+    Appends the submission to data/submissions/<username>.jsonl
     """
     data = request.get_json()
     username = data.get("username")
@@ -118,20 +94,8 @@ def add_submission():
     if not username:
         return jsonify({"message": "Username required"}), 400
 
-    # CORRECTED: We no longer need a separate student directory
-    # The SUBMISSIONS_PATH already exists.
-    student_file_path = SUBMISSIONS_PATH / f"{username}.json"
-    submissions = []
-
-    if student_file_path.exists() and os.path.getsize(student_file_path) > 0:
-        with open(student_file_path, "r", encoding="utf-8") as f:
-            try:
-                submissions = json.load(f)
-            except json.JSONDecodeError:
-                print(f"Warning: Overwriting malformed JSON for user {username}")
-                submissions = []
-
-    submissions.append(
+    SUBMISSION_LOG.append(
+        username,
         {
             "subject": data.get("subject"),
             "level": data.get("level"),
@@ -141,7 +105,4 @@ def add_submission():
         }
     )
 
-    with open(student_file_path, "w", encoding="utf-8") as f:
-        json.dump(submissions, f, indent=2)
-
     return jsonify({"message": "Submission saved"}), 201
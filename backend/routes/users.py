@@ -1,35 +1,31 @@
-import json
-from pathlib import Path
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from utils import user_store
+from utils.paging import parse_fields
 
 # --- Flask Blueprint Setup ---
 users_bp = Blueprint('users_bp', __name__)
 
-# --- Configuration ---
-BASE_DIR = Path(__file__).parent.parent
-USERS_FILE_PATH = BASE_DIR / "data" / "users.json"
-
 @users_bp.route('/', methods=['GET'])
 def get_users():
     """
     Returns the list of all users, excluding their passwords.
+
+    With any of fields, since, sort, limit or cursor it returns one page
+    instead: {"items": [...], "nextCursor": "...", "syncedAt": "..."}.
+    For example ?fields=username,role&sort=-updatedAt&limit=20.
     """
+    args = request.args
     try:
-        with open(USERS_FILE_PATH, 'r', encoding='utf-8') as f:
-            users_data = json.load(f)
-        
-        users_list = users_data.get("users", [])
-        
         # --- Security: Never send password hashes to the frontend ---
-        sanitized_users = []
-        for user in users_list:
-            user_copy = user.copy()
-            user_copy.pop('password', None) # Remove password if it exists
-            sanitized_users.append(user_copy)
-            
-        return jsonify(sanitized_users)
-    except FileNotFoundError:
-        return jsonify([]), 200 # Return empty list if no users file
+        if not any(key in args for key in ("fields", "since", "sort", "limit", "cursor")):
+            return jsonify(user_store.list_users(with_password=False))
+
+        return jsonify(user_store.page_users(
+            fields=parse_fields(args.get("fields"), list(user_store.USER_FIELDS)), since=args.get("since"),
+            sort=args.get("sort"), limit=args.get("limit", type=int), cursor=args.get("cursor"),
+        ))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching users: {e}")
         return jsonify({"message": "Failed to fetch users"}), 500
\ No newline at end of file
@@ -0,0 +1,70 @@
+# backend/scripts/bench_question_parsers.py
+#
+# python scripts/bench_question_parsers.py [rows]
+# Generates an ML workbook with `rows` part rows and times the previous row-by-row parser against
+# utils.question_parsers.parse_ml on it. The workbook is written to a scratch directory and removed afterwards.
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.question_parsers import parse_ml  # noqa: E402
+
+
+def legacy_parse_ml(path: Path) -> int:
+    # The previous row-by-row parser, kept here as the baseline.
+    df = pd.read_excel(path)
+    tasks = {}
+    for _, row in df.iterrows():
+        task_id = str(row.get("id", "")).strip()
+        if not task_id: continue
+        task = tasks.setdefault(task_id, {"id": task_id, "title": str(row.get("title", "")).strip(), "datasets": {}, "parts": []})
+        if pd.notna(row.get("train_dataset")): task["datasets"]["train"] = str(row.get("train_dataset")).strip()
+        part = {"part_id": str(row.get("part_id", "")).strip(), "type": str(row.get("type", "")).strip()}
+        for field in ["expected_text", "solution_file", "evaluation_label"]:
+            if pd.notna(row.get(field)): part[field] = str(row.get(field)).strip()
+        for field in ["expected_value", "tolerance"]:
+            if pd.notna(row.get(field)):
+                try: part[field] = float(row.get(field))
+                except (ValueError, TypeError): pass
+        task["parts"].append(part)
+    return len(tasks)
+
+
+def write_workbook(path: Path, rows: int) -> None:
+    # A regular workbook, so strings land in the shared-string table the way Excel saves them.
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "title", "description", "train_dataset", "test_dataset", "part_id", "type", "part_description",
+                  "expected_text", "evaluation_label", "solution_file", "key_columns", "expected_value", "tolerance"])
+    for i in range(rows):
+        task = i // 4
+        sheet.append([f"T{task}", f"Task {task}", "Predict the target.", f"train_{task}.csv", None, f"P{i % 4}", "csv_similarity",
+                      "Write predictions.", None if i % 3 else "accuracy", None, f"sol_{i}.csv", "id" if i % 2 else None,
+                      i * 0.5 if i % 5 else "n/a", 1e-5])
+    workbook.save(path)
+
+
+def benchmark(rows: int) -> None:
+    scratch = Path(tempfile.mkdtemp(prefix="ps-bench-"))
+    try:
+        path = scratch / "bench.xlsx"
+        write_workbook(path, rows)
+        print(f"Generated {rows} rows ({path.stat().st_size // 1024} KiB)")
+        for name, fn in (("row-by-row (previous)", legacy_parse_ml), ("vectorized", lambda p: len(parse_ml(p)))):
+            started = time.perf_counter()
+            count = fn(path)
+            print(f"{name:>22}: {time.perf_counter() - started:6.2f}s for {count} tasks")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,57 @@
+# backend/scripts/stress_progress.py
+#
+# python scripts/stress_progress.py [clients]
+# Fires concurrent level completions at a scratch database and checks that every one of them was
+# committed and acknowledged. The application database is never touched.
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Must be set before utils.db is imported: it reads the database path at import time.
+SCRATCH = Path(tempfile.mkdtemp(prefix="ps-stress-"))
+os.environ["PS_DB_PATH"] = str(SCRATCH / "stress.db")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.user_store import PROGRESS_WRITER, add_users, complete_level, list_users  # noqa: E402
+
+
+def stress(clients: int) -> bool:
+    students = max(1, clients // 2)
+    add_users({"username": f"stress{i}", "password": "x", "role": "student",
+               "progress": {"ds": {"level1": "unlocked", "level2": "locked", "level3": "locked"}}} for i in range(students))
+    # Every student finishes level1 and level2 at the same moment.
+    jobs = [(f"stress{i % students}", 1 + i // students) for i in range(clients)]
+    barrier = threading.Barrier(len(jobs))
+
+    def submit(job):
+        barrier.wait()
+        started = time.perf_counter()
+        user = complete_level(job[0], "ds", job[1])
+        return time.perf_counter() - started, user
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(len(jobs)) as pool: results = list(pool.map(submit, jobs))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(r[0] for r in results)
+    missing = [job for job, (_t, user) in zip(jobs, results) if not user or user["progress"]["ds"][f"level{job[1]}"] != "completed"]
+    last_level = f"level{(clients - 1) // students + 1}"
+    lost = [u["username"] for u in list_users() if u["username"].startswith("stress")
+            and u["progress"]["ds"].get(last_level) not in ("completed", "unlocked")]
+    print(f"{clients} submits in {elapsed:.3f}s: {PROGRESS_WRITER.commits} commits, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print("OK" if not missing and not lost else f"FAILED: unacknowledged {missing[:5]}, lost {lost[:5]}")
+    return not missing and not lost
+
+
+if __name__ == "__main__":
+    try:
+        ok = stress(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    sys.exit(0 if ok else 1)
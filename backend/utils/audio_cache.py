@@ -0,0 +1,107 @@
+# backend/utils/audio_cache.py
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+# Relative, so this module also imports when run scripts load it under their private package name.
+from .dataset_cache import CACHE_ROOT, DATASETS_ROOT, cache_path, resolve
+
+# --- Configuration ---
+# librosa.load's default rate; the rate students are expected to work at unless a task says otherwise.
+DEFAULT_SR = 22050
+AUDIO_DIR = "Speech-Recognition/input"
+
+
+def _paths(source: Path, sr: Optional[int], mono: bool) -> Tuple[Path, Path]:
+    variant = f".{sr or 'native'}{'' if mono else '.multi'}"
+    data = cache_path(source, f"{variant}.npy")
+    return data, data.with_suffix(".json")
+
+
+def _signature(source: Path) -> Dict:
+    stat = os.stat(source)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_meta(meta_path: Path) -> Optional[Dict]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def build(source: Path, sr: Optional[int] = DEFAULT_SR, mono: bool = True, force: bool = False) -> Tuple[Path, Dict]:
+    """
+    Decodes and resamples one audio file with librosa.load(sr=sr, mono=mono)
+    into a float32 .npy file next to a small JSON record of its sample rate
+    and the source file's mtime and size, unless an up-to-date pair exists.
+    The record is written last, so a half-built cache entry never looks
+    valid. Returns (npy path, record).
+    """
+    source = Path(source)
+    data_path, meta_path = _paths(source, sr, mono)
+    meta = _read_meta(meta_path)
+    if not force and meta and meta.get("source") == _signature(source) and data_path.exists():
+        return data_path, meta
+    import librosa  # Slow to import; only needed when something has to be decoded.
+    signature = _signature(source)
+    samples, rate = librosa.load(str(source), sr=sr, mono=mono)
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"  # Threads of one worker may decode the same file at once.
+    with open(str(data_path) + suffix, "wb") as f:
+        np.save(f, samples)
+    os.replace(str(data_path) + suffix, data_path)
+    meta = {"sr": int(rate), "mono": mono, "shape": list(samples.shape), "dtype": "float32",
+            "duration": round(samples.shape[-1] / rate, 6), "source": signature}
+    with open(str(meta_path) + suffix, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(str(meta_path) + suffix, meta_path)
+    return data_path, meta
+
+
+def register_question_audio(questions: Iterable[Dict]) -> List[Path]:
+    """Decodes every .wav input a question bank refers to. Returns the cache files."""
+    built = []
+    for question in questions:
+        for value in (question.get("datasets") or {}).values():
+            if not isinstance(value, str): continue
+            try:
+                source = resolve(value, ".wav", AUDIO_DIR)
+            except FileNotFoundError:
+                continue
+            built.append(build(source)[0])
+    return built
+
+
+def build_all(sr: Optional[int] = DEFAULT_SR, force: bool = False) -> List[Path]:
+    """Decodes every .wav under data/datasets."""
+    return [build(source, sr, force=force)[0] for source in sorted(DATASETS_ROOT.rglob("*.wav"))]
+
+
+def load_audio(name: Union[str, Path], sr: Optional[int] = DEFAULT_SR, mono: bool = True) -> Tuple[np.ndarray, int]:
+    """
+    Drop-in for librosa.load on the platform's audio inputs: returns
+    (samples, sample_rate) with float32 samples. The samples are a
+    copy-on-write memory map of the decoded cache, so kernels share one
+    decoded copy and nobody pays for decoding or resampling again; writing to
+    the array only copies the pages touched. `name` is the path shown in the
+    question or just the file name ('Audio33').
+    """
+    data_path, meta = build(resolve(name, ".wav", AUDIO_DIR), sr, mono)
+    return np.load(data_path, mmap_mode="c"), meta["sr"]
+
+
+if __name__ == "__main__":
+    # python -m utils.audio_cache build [--force]
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        paths = build_all(force="--force" in sys.argv)
+        print(f"{len(paths)} audio files cached under {CACHE_ROOT}.")
+    else:
+        print("usage: python -m utils.audio_cache build [--force]")
+        sys.exit(1)
@@ -0,0 +1,73 @@
+# backend/utils/course_config.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from flask import Response, request
+
+# --- Configuration ---
+COURSE_CONFIG_PATH = Path(__file__).resolve().parent.parent / "data" / "course_config.json"
+# Hand edits to the file are picked up after at most this many seconds; admin routes invalidate at once.
+COURSE_CONFIG_RECHECK_SECONDS = float(os.getenv("COURSE_CONFIG_RECHECK_SECONDS", "2"))
+
+
+class CourseConfigCache:
+    """
+    Parsed course_config.json shared by every request. Derived JSON bodies
+    (the full config, the subject -> levels structure) are encoded once per
+    config version together with a strong ETag, so conditional requests from
+    the frontend are answered with 304 and no body.
+    """
+
+    def __init__(self, path: Path = COURSE_CONFIG_PATH, recheck_seconds: float = COURSE_CONFIG_RECHECK_SECONDS):
+        self.path = path
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.Lock()
+        self._config: Optional[Dict] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._bodies: Dict[str, Tuple[bytes, str]] = {}
+
+    def get(self) -> Dict:
+        """The parsed config. Callers must not modify it. Raises FileNotFoundError if the file is missing."""
+        now = time.monotonic()
+        with self._lock:
+            if self._config is not None and now - self._checked_at < self.recheck_seconds: return self._config
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._config is None or signature != self._signature:
+                with open(self.path, 'r', encoding='utf-8') as f: self._config = json.load(f)
+                self._signature, self._bodies = signature, {}
+            self._checked_at = now
+            return self._config
+
+    def body(self, name: str, build: Callable[[Dict], object]) -> Tuple[bytes, str]:
+        """Returns (json_bytes, etag) for build(config), encoding it only once per config version."""
+        config = self.get()
+        with self._lock:
+            cached = self._bodies.get(name)
+            if cached is not None and self._config is config: return cached
+        payload = json.dumps(build(config), sort_keys=True, separators=(",", ":")).encode('utf-8')
+        cached = (payload, hashlib.sha256(payload).hexdigest()[:32])
+        with self._lock:
+            if self._config is config: self._bodies[name] = cached
+        return cached
+
+    def invalidate(self) -> None:
+        with self._lock: self._config, self._signature, self._bodies = None, None, {}
+
+
+def conditional_json(payload: bytes, etag: str) -> Response:
+    """A JSON response carrying a strong ETag; 304 Not Modified if the client already has it."""
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+COURSE_CONFIG = CourseConfigCache()
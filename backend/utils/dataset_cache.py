@@ -0,0 +1,151 @@
+# backend/utils/dataset_cache.py
+
+import mmap
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional: without it load_dataset falls back to pd.read_csv.
+    pa = None
+
+# --- Configuration ---
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATASETS_ROOT = DATA_DIR / "datasets"
+CACHE_ROOT = DATA_DIR / "dataset_cache"
+# Question banks give dataset paths as seen on the lab machines; everything after this marker is the name.
+PATH_MARKER = "data/datasets/"
+SOURCE_META = b"ps.source"
+
+
+def resolve(name: Union[str, Path], suffix: str = ".csv", default_dir: str = "ml") -> Path:
+    """
+    Maps a dataset name to its file under data/datasets. Accepts the path
+    shown in a question ('/home/.../data/datasets/ml/bike/train.csv'), a
+    relative name ('ml/bike/train.csv', 'ml/bike/train') or a name inside
+    `default_dir` ('bike/train'). Raises FileNotFoundError if there is no
+    such dataset.
+    """
+    text = str(name).replace("\\", "/")
+    if PATH_MARKER in text: text = text.split(PATH_MARKER, 1)[1]
+    text = text.lstrip("/")
+    stems = [text] if text.endswith(suffix) else [text, f"{text}{suffix}"]
+    for candidate in [DATASETS_ROOT / stem for stem in stems] + [DATASETS_ROOT / default_dir / stem for stem in stems]:
+        if candidate.is_file(): return candidate
+    raise FileNotFoundError(f"No dataset named '{name}' under {DATASETS_ROOT}.")
+
+
+def cache_path(source: Path, suffix: str = ".arrow") -> Path:
+    return CACHE_ROOT / source.resolve().relative_to(DATASETS_ROOT.resolve()).with_suffix(suffix)
+
+
+def _signature(source: Path) -> bytes:
+    stat = os.stat(source)
+    return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+
+def _is_fresh(source: Path, target: Path) -> bool:
+    if not target.exists(): return False
+    try:
+        with pa.memory_map(str(target)) as mapped:
+            metadata = pa.ipc.open_file(mapped).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return metadata.get(SOURCE_META) == _signature(source)
+
+
+def build(source: Path, force: bool = False) -> Optional[Path]:
+    """
+    Converts one CSV into an uncompressed Arrow IPC file, unless an up-to-date
+    one exists. The CSV is parsed with pd.read_csv, so the cached columns have
+    exactly the dtypes students get from reading the CSV themselves. Returns
+    the cache path, or None when pyarrow is not installed.
+    """
+    if pa is None: return None
+    source = Path(source)
+    target = cache_path(source)
+    if not force and _is_fresh(source, target): return target
+    signature = _signature(source)
+    table = pa.Table.from_pandas(pd.read_csv(source), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_META: signature})
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Threads of one worker may build the same dataset at once.
+    tmp_path = target.with_suffix(f".arrow.{os.getpid()}.{threading.get_ident()}.tmp")
+    # Uncompressed, so the file can be memory-mapped and read without decoding.
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, target)
+    return target
+
+
+def register_question_datasets(questions: Iterable[Dict]) -> List[Path]:
+    """Builds the cache for every CSV dataset a question bank refers to. Returns the cache files."""
+    built = []
+    for question in questions:
+        for value in (question.get("datasets") or {}).values():
+            if not isinstance(value, str) or not value.endswith(".csv"): continue
+            try:
+                target = build(resolve(value))
+            except FileNotFoundError:
+                continue
+            if target: built.append(target)
+    return built
+
+
+def build_all(force: bool = False) -> List[Path]:
+    """Builds the cache for every CSV under data/datasets."""
+    return [target for target in (build(source, force) for source in sorted(DATASETS_ROOT.rglob("*.csv"))) if target]
+
+
+def _shareable(column: "pa.ChunkedArray") -> bool:
+    # Integer and float columns without nulls have the same layout in Arrow and numpy.
+    return (column.num_chunks == 1 and len(column) > 0 and column.null_count == 0
+            and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)))
+
+
+def load_dataset(name: Union[str, Path], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Returns a registered dataset as a DataFrame with the same columns and
+    dtypes as pd.read_csv on its CSV. The data comes from a copy-on-write
+    memory map of the Arrow file, like load_audio: numeric columns without
+    missing values are numpy views of the mapping, so every kernel shares the
+    page cache's single copy instead of parsing its own, and writing to them
+    only copies the pages touched. Columns with strings or missing values are
+    materialized per call. Pass `columns` to load only some of them.
+    """
+    source = resolve(name)
+    if pa is None: return pd.read_csv(source, usecols=columns)
+    target = build(source)
+    with open(target, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    buffer = pa.py_buffer(mapped)
+    table = pa.ipc.open_file(pa.BufferReader(buffer)).read_all()
+    if columns is not None: table = table.select(columns)
+    # Arrow marks the arrays it hands to pandas read-only, so shareable columns are viewed through numpy instead.
+    data = {}
+    for column_name, column in zip(table.column_names, table.columns):
+        if not _shareable(column):
+            data[column_name] = column.to_pandas()
+            continue
+        chunk, dtype = column.chunk(0), np.dtype(column.type.to_pandas_dtype())
+        offset = chunk.buffers()[1].address - buffer.address + chunk.offset * dtype.itemsize
+        data[column_name] = np.frombuffer(mapped, dtype, len(chunk), offset)
+    # copy=False keeps one block per column instead of consolidating the views into fresh arrays.
+    return pd.DataFrame(data, copy=False)
+
+if __name__ == "__main__":
+    # python -m utils.dataset_cache build [--force]
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        if pa is None:
+            print("pyarrow is not installed; nothing to build.")
+            sys.exit(1)
+        targets = build_all(force="--force" in sys.argv)
+        print(f"{len(targets)} datasets cached under {CACHE_ROOT}.")
+    else:
+        print("usage: python -m utils.dataset_cache build [--force]")
+        sys.exit(1)
@@ -0,0 +1,53 @@
+# backend/utils/db.py
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# --- Configuration ---
+DB_PATH = Path(os.getenv("PS_DB_PATH", Path(__file__).resolve().parent.parent / "data" / "ps.db"))
+
+_local = threading.local()
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Returns this thread's connection to the application database, opening it
+    on first use. WAL mode lets readers run alongside the single writer.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def transaction():
+    """Runs the block in one write transaction, taking the write lock up front."""
+    conn = connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def snapshot():
+    """Runs the block's reads in one read transaction, so they all see the same committed state."""
+    conn = connect()
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.execute("COMMIT")
@@ -0,0 +1,82 @@
+# backend/utils/ds_harness.py
+
+import builtins
+import contextlib
+import io
+import time
+import traceback
+from typing import Dict, List
+
+# Prefix of the single stdout line that carries the batched results back from a kernel.
+RESULT_MARKER = "__DS_HARNESS_RESULTS__"
+
+
+def run_case(compiled_code, user_input: str, namespace: dict) -> Dict:
+    """
+    Executes already-compiled student code once against one test case.
+    stdin is served from `user_input` through the same `_mock_input` shim
+    used for interactive runs; stdout and stderr are captured separately.
+    """
+    input_lines = user_input.splitlines()
+    input_lines.reverse()
+
+    def _mock_input(prompt=''):
+        try: return input_lines.pop()
+        except IndexError: return ''
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    original_input = builtins.input
+    builtins.input = _mock_input
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exec(compiled_code, namespace)
+    except (Exception, SystemExit):
+        stderr.write(traceback.format_exc())
+    finally:
+        builtins.input = original_input
+    return {
+        "stdout": stdout.getvalue().strip(),
+        "stderr": stderr.getvalue().strip(),
+        "time": round(time.perf_counter() - start_time, 6),
+    }
+
+
+def case_passed(result: Dict, expected_output: str) -> bool:
+    """A case passes when it wrote nothing to stderr and its stdout matches exactly."""
+    return not result["stderr"] and result["stdout"] == str(expected_output).strip()
+
+
+def run_cases(code: str, test_cases: List[Dict], base_namespace: dict = None, stop_on_failure: bool = False) -> List[Dict]:
+    """
+    Runs every test case of a DS question and returns one result per case,
+    in order. Each case gets its own copy of `base_namespace` so state left
+    behind by one case cannot leak into the next. With `stop_on_failure`,
+    cases after the first failing one are reported as skipped.
+    """
+    try:
+        compiled_code = compile(code, "<student_code>", "exec")
+    except SyntaxError:
+        error = traceback.format_exc(limit=0).strip()
+        return [{"stdout": "", "stderr": error, "time": 0.0, "passed": False} for _ in test_cases]
+
+    results = []
+    for case in test_cases:
+        if stop_on_failure and results and not results[-1]["passed"]:
+            results.append({"stdout": "", "stderr": "Skipped after an earlier failure.", "time": 0.0, "passed": False})
+            continue
+        result = run_case(compiled_code, str(case.get("input", "")), dict(base_namespace or {"__name__": "__main__"}))
+        result["passed"] = case_passed(result, case.get("output", ""))
+        results.append(result)
+    return results
+
+
+# --- Worker entry point ---
+# `python -m utils.ds_harness` reads {"code": ..., "test_cases": [...]} from stdin
+# and prints the result vector on a RESULT_MARKER line. Used by utils.grading_pool.
+if __name__ == "__main__":
+    import json
+    import sys
+    job = json.load(sys.stdin)
+    results = run_cases(job["code"], job["test_cases"], stop_on_failure=job.get("stop_on_failure", False))
+    sys.stdout.write("\n" + RESULT_MARKER + json.dumps(results) + "\n")
@@ -0,0 +1,87 @@
+# backend/utils/grading_pool.py
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List
+from utils.ds_harness import RESULT_MARKER
+
+# --- Configuration ---
+BACKEND_PATH = Path(__file__).resolve().parent.parent
+GRADING_WORKERS = int(os.getenv("DS_GRADING_WORKERS", str(os.cpu_count() or 2)))
+
+# Bounds the number of worker interpreters alive at once across all requests.
+_EXECUTOR = ThreadPoolExecutor(max_workers=GRADING_WORKERS, thread_name_prefix="ds-grader")
+
+
+def _failed_results(count: int, message: str) -> List[Dict]:
+    return [{"stdout": "", "stderr": message, "time": 0.0, "passed": False} for _ in range(count)]
+
+
+class _CaseBatch:
+    """One contiguous slice of a question's test cases, run in its own interpreter."""
+
+    def __init__(self, code: str, test_cases: List[Dict], case_timeout: int, stop_on_failure: bool):
+        self.code = code
+        self.test_cases = test_cases
+        self.timeout = case_timeout * len(test_cases)
+        self.stop_on_failure = stop_on_failure
+        self.process = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def run(self) -> List[Dict]:
+        with self._lock:
+            if self.cancelled: return _failed_results(len(self.test_cases), "Skipped after an earlier failure.")
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "utils.ds_harness"], cwd=str(BACKEND_PATH),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+        payload = json.dumps({"code": self.code, "test_cases": self.test_cases, "stop_on_failure": self.stop_on_failure})
+        try:
+            stdout, stderr = self.process.communicate(payload, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill(); self.process.communicate()
+            return _failed_results(len(self.test_cases), f"[Worker Timeout] Execution exceeded {self.timeout} seconds.")
+        if self.cancelled: return _failed_results(len(self.test_cases), "Skipped after an earlier failure.")
+        for line in reversed(stdout.splitlines()):
+            if line.startswith(RESULT_MARKER): return json.loads(line[len(RESULT_MARKER):])
+        return _failed_results(len(self.test_cases), stderr.strip() or "The grading worker exited without results.")
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self.process is not None and self.process.poll() is None: self.process.kill()
+
+
+def run_cases_in_workers(code: str, test_cases: List[Dict], stop_on_failure: bool = False, timeout: int = 45) -> List[Dict]:
+    """
+    Spreads a DS question's test cases over separate worker interpreters and
+    returns the per-case results in the original order. Workers start from an
+    empty namespace, so unlike the interactive kernel the student code must be
+    self-contained. With `stop_on_failure`, a batch stops at its first failing
+    case and the other batches are killed; their cases are reported as skipped.
+    Each batch may take `timeout` seconds per case it holds.
+    """
+    if not test_cases: return []
+    num_batches = min(GRADING_WORKERS, len(test_cases))
+    batch_size = -(-len(test_cases) // num_batches)
+    batches = [_CaseBatch(code, test_cases[i:i + batch_size], timeout, stop_on_failure) for i in range(0, len(test_cases), batch_size)]
+    futures = {_EXECUTOR.submit(batch.run): index for index, batch in enumerate(batches)}
+    batch_results: Dict[int, List[Dict]] = {}
+
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            batch_results[futures[future]] = future.result()
+        if stop_on_failure and any(not r["passed"] for rs in batch_results.values() for r in rs):
+            for batch in batches: batch.cancel()
+            for future in pending: batch_results[futures[future]] = future.result()
+            break
+
+    return [result for index in range(len(batches)) for result in batch_results[index]]
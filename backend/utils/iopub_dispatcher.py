@@ -0,0 +1,225 @@
+# backend/utils/iopub_dispatcher.py
+
+import itertools
+import threading
+import time
+from collections import deque
+from queue import Empty
+from typing import Callable, Dict, List, Optional, Tuple
+import zmq
+from jupyter_client.manager import KernelClient
+
+_WAKE_ADDRESSES = itertools.count()
+
+
+class Execution:
+    """
+    One execute_request in flight. The dispatcher thread feeds it the iopub
+    messages whose parent is this request and sets `done` the moment the
+    kernel reports `idle` for it.
+    """
+
+    def __init__(self, msg_id: str, on_message: Optional[Callable[[Dict], None]] = None):
+        self.msg_id = msg_id
+        self.on_message = on_message
+        self.stdout: List[str] = []
+        self.stderr: List[str] = []
+        self.done = threading.Event()
+
+    def handle(self, msg: Dict) -> None:
+        msg_type = msg['header']['msg_type']
+        content = msg.get('content', {})
+        if msg_type == 'stream':
+            if content.get('name') == 'stdout': self.stdout.append(content.get('text', ''))
+            else: self.stderr.append(content.get('text', ''))
+        elif msg_type == 'error': self.stderr.append('\n'.join(content.get('traceback', [])))
+        if self.on_message: self.on_message(msg)
+        if msg_type == 'status' and content.get('execution_state') == 'idle': self.done.set()
+
+    def wait(self, timeout: float) -> bool:
+        return self.done.wait(timeout)
+
+    def output(self) -> Tuple[str, str]:
+        return "".join(self.stdout).strip(), "".join(self.stderr).strip()
+
+
+class OutputStream:
+    """
+    Buffers the stream/error messages of one Execution for a streaming HTTP
+    response. The dispatcher thread must never block on a slow client, so
+    consecutive chunks of the same stream are coalesced and anything beyond
+    `max_buffered_chars` is dropped and counted instead of queued.
+    """
+
+    def __init__(self, max_buffered_chars: int = 1_000_000):
+        self.max_buffered_chars = max_buffered_chars
+        self.dropped_chars = 0
+        self.finished = False
+        self._events = deque()
+        self._buffered_chars = 0
+        self._cond = threading.Condition()
+
+    def on_message(self, msg: Dict) -> None:
+        msg_type = msg['header']['msg_type']
+        content = msg.get('content', {})
+        with self._cond:
+            if msg_type == 'stream':
+                text = content.get('text', '')
+                room = self.max_buffered_chars - self._buffered_chars
+                if len(text) > room:
+                    self.dropped_chars += len(text) - max(room, 0)
+                    text = text[:max(room, 0)]
+                    if not text: return
+                self._buffered_chars += len(text)
+                if self._events and self._events[-1][0] == 'stream' and self._events[-1][1]['name'] == content.get('name'):
+                    self._events[-1][1]['text'] += text
+                else:
+                    self._events.append(('stream', {'name': content.get('name'), 'text': text}))
+            elif msg_type == 'error':
+                self._events.append(('error', {k: content.get(k) for k in ('ename', 'evalue', 'traceback')}))
+            elif msg_type == 'status' and content.get('execution_state') == 'idle':
+                self.finished = True
+            else:
+                return
+            self._cond.notify_all()
+
+    def next_events(self, timeout: float) -> List[Tuple[str, Dict]]:
+        """Waits up to `timeout` seconds for buffered events and takes all of them."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._events and not self.finished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                self._cond.wait(remaining)
+            events = list(self._events)
+            self._events.clear()
+            self._buffered_chars = 0
+            return events
+
+
+class IOPubDispatcher:
+    """
+    A single thread that polls the iopub sockets of every registered kernel
+    client and routes each message to the Execution waiting on its parent
+    msg_id. Shell replies are drained and dropped so they never pile up.
+    Because zmq sockets are not thread-safe, execute requests are also sent
+    from this thread: callers queue them and wake it. Kernels register
+    themselves on their first execute; they must be unregistered before
+    their channels are stopped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executions: Dict[str, Execution] = {}
+        self._clients: Dict[int, KernelClient] = {}
+        self._ops: List[Tuple[str, KernelClient, Optional[Dict], threading.Event]] = []
+        self._thread = None
+        self._wake_lock = threading.Lock()
+        self._wake_send = None
+        self._wake_recv = None
+
+    def execute(self, kc: KernelClient, code: str, on_message: Optional[Callable[[Dict], None]] = None) -> Execution:
+        """
+        Queues `code` for the kernel and returns its Execution. The waiter is
+        registered before the request goes out, so no output can be missed.
+        """
+        self.register(kc)
+        msg = kc.session.msg("execute_request", {
+            "code": code, "silent": False, "store_history": True,
+            "user_expressions": {}, "allow_stdin": False, "stop_on_error": True,
+        })
+        execution = Execution(msg["header"]["msg_id"], on_message)
+        with self._lock: self._executions[execution.msg_id] = execution
+        self._submit("send", kc, msg)
+        return execution
+
+    def cancel(self, execution: Execution) -> None:
+        """Stops routing messages to an execution, e.g. after its caller timed out."""
+        with self._lock: self._executions.pop(execution.msg_id, None)
+
+    def register(self, kc: KernelClient) -> None:
+        """Adds a kernel client to the poll set (idempotent). Operations are applied in order, so a send queued after this finds it registered."""
+        with self._lock:
+            if id(kc) in self._clients: return
+            self._clients[id(kc)] = kc
+        self._start()
+        self._submit("register", kc)
+
+    def unregister(self, kc: KernelClient) -> None:
+        """Removes a kernel client from the poll set and waits until the dispatcher has let go of its sockets."""
+        with self._lock:
+            if self._clients.pop(id(kc), None) is None: return
+        self._submit("unregister", kc).wait(5)
+
+    def _start(self) -> None:
+        with self._wake_lock:
+            if self._thread is not None: return
+            context = zmq.Context.instance()
+            address = f"inproc://iopub-dispatcher-{next(_WAKE_ADDRESSES)}"
+            self._wake_recv = context.socket(zmq.PAIR); self._wake_recv.bind(address)
+            self._wake_send = context.socket(zmq.PAIR); self._wake_send.connect(address)
+            self._thread = threading.Thread(target=self._run, name="iopub-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _submit(self, op: str, kc: KernelClient, msg: Optional[Dict] = None) -> threading.Event:
+        applied = threading.Event()
+        with self._lock: self._ops.append((op, kc, msg, applied))
+        with self._wake_lock: self._wake_send.send(b"")
+        return applied
+
+    def _run(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self._wake_recv, zmq.POLLIN)
+        channels = {}
+        while True:
+            try:
+                events = dict(poller.poll())
+            except zmq.ZMQError as e:
+                print(f"iopub dispatcher poll error: {e}"); continue
+            if self._wake_recv in events:
+                while self._wake_recv.poll(0): self._wake_recv.recv()
+                with self._lock: ops, self._ops = self._ops, []
+                for op, kc, msg, applied in ops:
+                    if op == "send":
+                        self._send(kc, msg); applied.set(); continue
+                    for channel in (kc.iopub_channel, kc.shell_channel):
+                        if op == "register":
+                            channels[channel.socket] = channel; poller.register(channel.socket, zmq.POLLIN)
+                        elif channels.pop(channel.socket, None) is not None:
+                            poller.unregister(channel.socket)
+                    applied.set()
+            for socket in events:
+                channel = channels.get(socket)
+                if channel is not None: self._drain(channel)
+
+    def _send(self, kc: KernelClient, msg: Dict) -> None:
+        try:
+            kc.shell_channel.send(msg)
+        except Exception as e:
+            print(f"iopub dispatcher could not send an execute request: {e}")
+            with self._lock: execution = self._executions.pop(msg["header"]["msg_id"], None)
+            if execution is not None:
+                execution.stderr.append(f"Could not send the code to the kernel: {e}")
+                execution.done.set()
+
+    def _drain(self, channel) -> None:
+        while True:
+            try:
+                msg = channel.get_msg(timeout=0)
+            except Empty:
+                return
+            except Exception as e:
+                print(f"iopub dispatcher dropped an unreadable message: {e}"); return
+            if msg['header']['msg_type'] == 'execute_reply': continue
+            with self._lock:
+                execution = self._executions.get(msg.get('parent_header', {}).get('msg_id'))
+            if execution is None: continue
+            try:
+                execution.handle(msg)
+            except Exception as e:
+                print(f"iopub dispatcher callback error: {e}")
+            if execution.done.is_set():
+                with self._lock: self._executions.pop(execution.msg_id, None)
+
+
+IOPUB_DISPATCHER = IOPubDispatcher()
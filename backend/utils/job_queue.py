@@ -0,0 +1,219 @@
+# backend/utils/job_queue.py
+
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from queue import PriorityQueue
+from typing import Any, Callable, Dict, Optional
+from utils.db import connect, transaction
+
+# --- Configuration ---
+# 0 sizes the pool from the kernel count: every session kernel can run a job at the same time.
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "0"))
+JOB_RETENTION_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluation_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    http_status INTEGER,
+    error TEXT,
+    owner_pid INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+"""
+# How often a status request for a job run by another worker re-reads it while waiting.
+POLL_SECONDS = 0.5
+
+# Lower value runs first.
+PRIORITY_GRADING = 0
+PRIORITY_INTERACTIVE = 10
+
+
+class Job:
+    """A unit of evaluation work and, once finished, its result."""
+
+    def __init__(self, kind: str, fn: Callable[[], Any], priority: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.priority = priority
+        self.fn = fn
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        return _status(self.id, self.kind, self.status, self.result, self.error, self.enqueued_at, self.started_at, self.finished_at)
+
+
+def _status(job_id: str, kind: str, status: str, result, error: Optional[str], enqueued_at: float,
+            started_at: Optional[float], finished_at: Optional[float]) -> Dict:
+    info = {"jobId": job_id, "kind": kind, "status": status}
+    if started_at: info["waitSeconds"] = round(started_at - enqueued_at, 3)
+    if finished_at: info["runSeconds"] = round(finished_at - started_at, 3)
+    if status == "done": info["result"], info["httpStatus"] = result
+    if status == "failed": info["error"] = error
+    return info
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class JobQueue:
+    """
+    Priority queue of evaluation jobs served by local worker threads. Workers
+    spend most of their time waiting on kernels, so threads are enough; the
+    point is to keep that waiting off the HTTP threads and to let grading
+    jobs overtake ad-hoc runs. Threads are started on demand, one whenever a
+    job arrives and none is idle, up to `workers`, which should be the number
+    of kernels that can execute at once. A job function returns a
+    (payload, http_status) pair. Job status and results are also written to
+    the application database, so with several web workers a client can poll
+    any of them; finished jobs are kept for JOB_RETENTION_SECONDS.
+    """
+
+    def __init__(self, workers: int, retention: int = JOB_RETENTION_SECONDS):
+        self.workers = max(1, workers)
+        self.retention = retention
+        self._queue: PriorityQueue = PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._queued = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._ready = False
+
+    def _open(self) -> None:
+        # Caller holds the lock.
+        if self._ready: return
+        connect().executescript(SCHEMA)
+        self._ready = True
+
+    def submit(self, kind: str, fn: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> Job:
+        job = Job(kind, fn, priority)
+        with self._lock:
+            self._open()
+            self._purge_finished()
+            with transaction() as conn:
+                conn.execute("DELETE FROM evaluation_jobs WHERE finished_at < ?", (time.time() - self.retention,))
+                conn.execute("INSERT INTO evaluation_jobs (id, kind, status, owner_pid, enqueued_at) VALUES (?, ?, 'queued', ?, ?)",
+                             (job.id, kind, os.getpid(), job.enqueued_at))
+            self._jobs[job.id] = job
+            self._queued += 1
+            if self._queued > len(self._threads) - self._running and len(self._threads) < self.workers: self._start_worker()
+        self._queue.put((priority, next(self._sequence), job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, if this process runs it."""
+        with self._lock: return self._jobs.get(job_id)
+
+    def status(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Status of a job run by any worker, waiting up to `wait` seconds for it
+        to finish. None when there is no such job or it has expired.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.wait(wait)
+            return job.to_dict()
+        with self._lock: self._open()
+        deadline = time.monotonic() + wait
+        while True:
+            row = connect().execute("SELECT * FROM evaluation_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None: return None
+            status, error = row["status"], row["error"]
+            if status in ("queued", "running") and not _alive(row["owner_pid"]):
+                # The worker that accepted the job is gone (e.g. a restart); it will never finish.
+                status, error = "failed", "Interrupted: the server restarted before the evaluation finished."
+            if status not in ("queued", "running") or time.monotonic() >= deadline:
+                result = (json.loads(row["result"]), row["http_status"]) if status == "done" else None
+                return _status(row["id"], row["kind"], status, result, error, row["enqueued_at"], row["started_at"], row["finished_at"])
+            time.sleep(POLL_SECONDS)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job.status == "queued"]
+            return {
+                "workers": self.workers, "threads": len(self._threads), "depth": len(queued), "running": self._running,
+                "completed": self._completed,
+                "oldestQueuedSeconds": round(max((now - job.enqueued_at for job in queued), default=0.0), 3),
+                "avgWaitSeconds": round(self._total_wait / self._completed, 3) if self._completed else 0.0,
+                "maxWaitSeconds": round(self._max_wait, 3),
+            }
+
+    def _start_worker(self) -> None:
+        # Caller holds the lock.
+        thread = threading.Thread(target=self._work, name=f"eval-worker-{len(self._threads)}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            _priority, _seq, job = self._queue.get()
+            job.started_at = time.time()
+            with self._lock: self._queued -= 1; self._running += 1
+            job.status = "running"
+            self._record(job.id, status="running", started_at=job.started_at)
+            try:
+                job.result = job.fn()
+                result = json.dumps(job.result[0], default=str)
+                job.status = "done"
+            except Exception as e:
+                print(f"Evaluation job {job.id} ({job.kind}) failed: {e}")
+                job.error, job.status = str(e), "failed"
+            job.finished_at = time.time()
+            job.fn = None
+            if job.status == "done":
+                self._record(job.id, status="done", result=result, http_status=job.result[1], finished_at=job.finished_at)
+            else:
+                self._record(job.id, status="failed", error=job.error, finished_at=job.finished_at)
+            wait = job.started_at - job.enqueued_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            job.done.set()
+
+    @staticmethod
+    def _record(job_id: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        try:
+            with transaction() as conn:
+                conn.execute(f"UPDATE evaluation_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        except Exception as e:
+            # Local waiters still get the result; only polls through other workers miss this update.
+            print(f"Evaluation job {job_id}: status not saved: {e}")
+
+    def _purge_finished(self) -> None:
+        # Caller holds the lock.
+        cutoff = time.time() - self.retention
+        for job_id in [jid for jid, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,98 @@
+# backend/utils/kernel_broker.py
+
+import os
+import secrets
+import sys
+import threading
+from multiprocessing.connection import Listener
+from pathlib import Path
+from utils.kernel_service import KERNEL_BROKER_AUTHKEY, LocalKernelService, authkey_path
+
+# --- Configuration ---
+DEFAULT_SOCKET = Path(__file__).resolve().parent.parent / "data" / "kernel-broker.sock"
+
+# Calls a web worker may make; each maps onto the LocalKernelService method of the same name.
+OPERATIONS = ("start_session", "has_session", "eviction_reason", "end_session", "execute", "stats")
+
+
+def _handle(conn, service: LocalKernelService) -> None:
+    """Serves one worker connection until it closes. Requests are (op, args) tuples."""
+    try:
+        while True:
+            try:
+                op, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if op == "stream":
+                    events = service.stream(*args)
+                    try:
+                        for event in events: conn.send(("event", event))
+                    finally:
+                        events.close()  # Releases the lease even if the worker went away mid-stream.
+                elif op in OPERATIONS:
+                    conn.send(("ok", getattr(service, op)(*args)))
+                else:
+                    conn.send(("error", f"Unknown kernel broker operation: {op}"))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                print(f"Kernel broker: {op} failed: {e}")
+                conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+def _authkey(socket_path: Path) -> bytes:
+    """KERNEL_BROKER_AUTHKEY if set, otherwise a fresh random key written to <socket>.key, readable by this user only."""
+    if KERNEL_BROKER_AUTHKEY: return KERNEL_BROKER_AUTHKEY.encode()
+    key, path = secrets.token_hex(32).encode(), authkey_path(socket_path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        os.write(fd, key)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+    return key
+
+
+def serve(socket_path: Path = DEFAULT_SOCKET) -> None:
+    """
+    Owns every session kernel on this machine and executes code in them on
+    behalf of the web workers, which connect with
+    KERNEL_BROKER=unix:<socket_path>. Run it once per host, before the
+    workers, e.g.:
+
+        python -m utils.kernel_broker data/kernel-broker.sock
+        KERNEL_BROKER=unix:data/kernel-broker.sock gunicorn -w 4 app:app
+
+    The workers authenticate with KERNEL_BROKER_AUTHKEY or, when it is
+    unset, with the random key the broker writes to <socket_path>.key.
+
+    Evaluation job queues and the question/solution caches stay in each
+    worker; only the kernels are shared. Job status and results go through
+    the application database, so a job can be polled from any worker.
+    """
+    socket_path = Path(socket_path)
+    if socket_path.exists(): socket_path.unlink()
+    authkey = _authkey(socket_path)
+    service = LocalKernelService()
+    service.start()
+    listener = Listener(str(socket_path), family="AF_UNIX", authkey=authkey)
+    os.chmod(socket_path, 0o600)
+    print(f"Kernel broker listening on {socket_path}")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # A client that fails the authkey handshake must not take the broker down.
+                print(f"Kernel broker: rejected connection: {e}"); continue
+            threading.Thread(target=_handle, args=(conn, service), name="kernel-broker-conn", daemon=True).start()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    serve(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SOCKET)
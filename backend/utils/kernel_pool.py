@@ -0,0 +1,128 @@
+# backend/utils/kernel_pool.py
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Tuple
+from jupyter_client.manager import KernelManager, KernelClient
+from utils.iopub_dispatcher import IOPUB_DISPATCHER
+
+KernelHandle = Tuple[KernelManager, KernelClient]
+
+# --- Configuration ---
+DEFAULT_POOL_SIZE = int(os.getenv("KERNEL_POOL_SIZE", "4"))
+KERNEL_READY_TIMEOUT = 60
+REFILL_RETRY_DELAY = 5
+
+
+def start_kernel(ready_timeout: int = KERNEL_READY_TIMEOUT) -> KernelHandle:
+    """
+    Starts a new IPython kernel and blocks until it answers on its channels.
+    The kernel is shut down again if it never becomes ready.
+    """
+    km = KernelManager()
+    km.start_kernel()
+    try:
+        kc = km.client(); kc.start_channels(); kc.wait_for_ready(timeout=ready_timeout)
+    except Exception:
+        if km.is_alive(): km.shutdown_kernel(now=True)
+        raise
+    return km, kc
+
+
+def shutdown_kernel(handle: KernelHandle) -> None:
+    """Stops the client channels and the kernel process, ignoring dead handles."""
+    km, kc = handle
+    try:
+        IOPUB_DISPATCHER.unregister(kc)
+        if kc.is_alive(): kc.stop_channels()
+        if km.is_alive(): km.shutdown_kernel()
+    except Exception as e:
+        print(f"Error shutting down kernel: {e}")
+
+
+class KernelPool:
+    """
+    Keeps a number of started, ready kernels so that a new exam session can be
+    handed one immediately. A background thread tops the pool back up after
+    every acquire; only when the pool is empty does a caller pay for a cold start.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, ready_timeout: int = KERNEL_READY_TIMEOUT):
+        self.size = max(0, size)
+        self.ready_timeout = ready_timeout
+        self._ready: Deque[KernelHandle] = deque()
+        self._starting = 0
+        self._hits = 0
+        self._misses = 0
+        self._failures = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self) -> None:
+        """Starts the refill thread. Calling this more than once is a no-op."""
+        with self._cond:
+            if self._thread is not None or self.size == 0: return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._refill_loop, name="kernel-pool-refill", daemon=True)
+            self._thread.start()
+        atexit.register(self.shutdown)
+        print(f"Kernel pool started (target size: {self.size}).")
+
+    def acquire(self) -> KernelHandle:
+        """
+        Returns a ready kernel from the pool, or starts one inline if the pool
+        is empty. Kernels that died while waiting in the pool are discarded.
+        """
+        with self._cond:
+            while self._ready:
+                handle = self._ready.popleft()
+                if handle[0].is_alive():
+                    self._hits += 1
+                    self._cond.notify_all()
+                    return handle
+                threading.Thread(target=shutdown_kernel, args=(handle,), daemon=True).start()
+            self._misses += 1
+            self._cond.notify_all()
+        return start_kernel(self.ready_timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "target_size": self.size, "ready": len(self._ready), "starting": self._starting,
+                "hits": self._hits, "misses": self._misses, "start_failures": self._failures,
+            }
+
+    def shutdown(self) -> None:
+        """Stops refilling and shuts down every kernel still waiting in the pool."""
+        with self._cond:
+            self._stopped = True
+            idle = list(self._ready)
+            self._ready.clear()
+            self._cond.notify_all()
+        for handle in idle: shutdown_kernel(handle)
+
+    def _refill_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and len(self._ready) + self._starting >= self.size:
+                    self._cond.wait()
+                if self._stopped: return
+                self._starting += 1
+            handle, failed = None, False
+            try:
+                handle = start_kernel(self.ready_timeout)
+            except Exception as e:
+                print(f"Kernel pool failed to start a kernel: {e}")
+                failed = True
+            with self._cond:
+                self._starting -= 1
+                if failed: self._failures += 1
+                elif not self._stopped:
+                    self._ready.append(handle)
+                    handle = None
+            if handle is not None: shutdown_kernel(handle)
+            if failed: time.sleep(REFILL_RETRY_DELAY)
@@ -0,0 +1,191 @@
+# backend/utils/kernel_registry.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from utils.kernel_pool import KernelHandle, shutdown_kernel
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# --- Configuration ---
+KERNEL_IDLE_TIMEOUT = int(os.getenv("KERNEL_IDLE_TIMEOUT", "1800"))
+MAX_KERNELS = int(os.getenv("MAX_KERNELS", "100"))
+KERNEL_RSS_BUDGET_MB = int(os.getenv("KERNEL_RSS_BUDGET_MB", "0"))  # 0 disables the memory budget
+KERNEL_REAP_INTERVAL = int(os.getenv("KERNEL_REAP_INTERVAL", "60"))
+EVICTED_HISTORY_SIZE = 5000
+
+
+def kernel_rss_bytes(handle: KernelHandle) -> int:
+    """Resident memory of a kernel process, or 0 if it cannot be determined."""
+    pid = getattr(handle[0].provisioner, "pid", None)
+    if not pid: return 0
+    try:
+        if psutil is not None: return psutil.Process(pid).memory_info().rss
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+class _Session:
+    __slots__ = ("handle", "last_active", "in_use")
+
+    def __init__(self, handle: KernelHandle):
+        self.handle = handle
+        self.last_active = time.monotonic()
+        self.in_use = 0
+
+
+class KernelRegistry:
+    """
+    Holds the kernel of every active exam session in least-recently-used order.
+    A background reaper shuts down kernels that have been idle for too long and
+    evicts the least recently used ones when the kernel count or the total RSS
+    goes over budget. Evicted session ids are remembered so the API can tell the
+    student to restart instead of reporting an unknown session.
+    """
+
+    def __init__(self, idle_timeout: int = KERNEL_IDLE_TIMEOUT, max_kernels: int = MAX_KERNELS,
+                 rss_budget_mb: int = KERNEL_RSS_BUDGET_MB, reap_interval: int = KERNEL_REAP_INTERVAL):
+        self.idle_timeout = idle_timeout
+        self.max_kernels = max_kernels
+        self.rss_budget = rss_budget_mb * 1024 * 1024
+        self.reap_interval = reap_interval
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._evicted: "OrderedDict[str, str]" = OrderedDict()
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock: return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock: return len(self._sessions)
+
+    def add(self, session_id: str, handle: KernelHandle) -> None:
+        """Registers a session's kernel, evicting the LRU sessions if over the kernel count."""
+        with self._lock:
+            self._sessions[session_id] = _Session(handle)
+            self._evicted.pop(session_id, None)
+            victims = self._evict_over_count(keep=session_id)
+        self._shutdown_async(victims)
+
+    def pop(self, session_id: str) -> Optional[KernelHandle]:
+        """Removes a session and hands its kernel back to the caller for shutdown."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        return session.handle if session else None
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                session.last_active = time.monotonic()
+                self._sessions.move_to_end(session_id)
+
+    @contextmanager
+    def lease(self, session_id: str):
+        """
+        Yields the session's kernel handle (or None) and marks it busy, so the
+        reaper never evicts a kernel in the middle of an execution.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                session.in_use += 1
+                session.last_active = time.monotonic()
+                self._sessions.move_to_end(session_id)
+        try:
+            yield session.handle if session else None
+        finally:
+            if session:
+                with self._lock:
+                    session.in_use -= 1
+                    session.last_active = time.monotonic()
+
+    def eviction_reason(self, session_id: str) -> Optional[str]:
+        with self._lock: return self._evicted.get(session_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "active": len(self._sessions), "max_kernels": self.max_kernels,
+                "idle_timeout": self.idle_timeout, "rss_budget_mb": self.rss_budget // (1024 * 1024),
+                "evictions": self._evictions,
+            }
+
+    def start(self) -> None:
+        """Starts the reaper thread. Calling this more than once is a no-op."""
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=self._reap_loop, name="kernel-reaper", daemon=True)
+        self._thread.start()
+
+    def reap(self) -> List[str]:
+        """Runs one eviction pass and returns the evicted session ids."""
+        now = time.monotonic()
+        with self._lock:
+            victims = [
+                self._mark_evicted(session_id, "idle")
+                for session_id, session in list(self._sessions.items())
+                if session.in_use == 0 and now - session.last_active > self.idle_timeout
+            ]
+            victims += self._evict_over_count()
+            handles = [s.handle for s in self._sessions.values()] if self.rss_budget else []
+            idle_lru = [(sid, s.handle) for sid, s in self._sessions.items() if s.in_use == 0] if self.rss_budget else []
+        for _session_id, handle in victims: shutdown_kernel(handle)
+        evicted = [session_id for session_id, _handle in victims]
+        if self.rss_budget: evicted += self._evict_over_memory(handles, idle_lru)
+        return evicted
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(self.reap_interval):
+            try:
+                evicted = self.reap()
+                if evicted: print(f"Kernel reaper evicted {len(evicted)} session(s): {evicted}")
+            except Exception as e:
+                print(f"Kernel reaper error: {e}")
+
+    def _evict_over_memory(self, handles: List[KernelHandle], idle_lru) -> List[str]:
+        # RSS is sampled outside the lock; the LRU order of `idle_lru` decides who goes first.
+        total_rss = sum(kernel_rss_bytes(handle) for handle in handles)
+        evicted = []
+        for session_id, handle in idle_lru:
+            if total_rss <= self.rss_budget: break
+            rss = kernel_rss_bytes(handle)
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if not session or session.in_use or session.handle is not handle: continue
+                self._mark_evicted(session_id, "memory")
+            shutdown_kernel(handle)
+            total_rss -= rss
+            evicted.append(session_id)
+        return evicted
+
+    def _evict_over_count(self, keep: str = None):
+        # Caller holds the lock. Busy sessions are skipped, so the count can briefly exceed the cap.
+        victims = []
+        idle_ids = [sid for sid, s in self._sessions.items() if s.in_use == 0 and sid != keep]
+        while len(self._sessions) > self.max_kernels and idle_ids:
+            victims.append(self._mark_evicted(idle_ids.pop(0), "capacity"))
+        return victims
+
+    def _mark_evicted(self, session_id: str, reason: str):
+        # Caller holds the lock.
+        session = self._sessions.pop(session_id)
+        self._evicted[session_id] = reason
+        while len(self._evicted) > EVICTED_HISTORY_SIZE: self._evicted.popitem(last=False)
+        self._evictions += 1
+        return session_id, session.handle
+
+    @staticmethod
+    def _shutdown_async(victims) -> None:
+        for _session_id, handle in victims:
+            threading.Thread(target=shutdown_kernel, args=(handle,), daemon=True).start()
@@ -0,0 +1,198 @@
+# backend/utils/kernel_service.py
+
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from utils.iopub_dispatcher import IOPUB_DISPATCHER, OutputStream
+from utils.kernel_pool import KernelPool, shutdown_kernel
+from utils.kernel_registry import KernelRegistry
+
+# --- Configuration ---
+# "unix:/path/to/broker.sock" sends all kernel work to a broker (python -m utils.kernel_broker);
+# unset keeps the kernels inside this process, which only works with a single web worker.
+KERNEL_BROKER = os.getenv("KERNEL_BROKER", "")
+# Shared secret for the broker handshake. When unset, the broker generates one each time it starts and
+# writes it next to its socket (<socket>.key, mode 0600), where the workers read it.
+KERNEL_BROKER_AUTHKEY = os.getenv("KERNEL_BROKER_AUTHKEY", "")
+KEEPALIVE_SECONDS = 15
+
+Event = Tuple[str, Optional[Dict]]
+
+
+def authkey_path(socket_path: str) -> Path:
+    return Path(f"{socket_path}.key")
+
+
+def read_authkey(socket_path: str) -> bytes:
+    """The broker's authkey: KERNEL_BROKER_AUTHKEY, or the key the broker listening on `socket_path` wrote."""
+    if KERNEL_BROKER_AUTHKEY: return KERNEL_BROKER_AUTHKEY.encode()
+    return authkey_path(socket_path).read_bytes()
+
+
+def timeout_message(timeout: float) -> str:
+    return f"\n[Kernel Timeout] Execution exceeded {timeout} seconds."
+
+
+class LocalKernelService:
+    """
+    Session kernels owned by this process: a warm pool, the session registry
+    with its reaper, and execution through the shared iopub dispatcher.
+    Sessions are addressed by id only, so the same calls can be served
+    remotely by the kernel broker.
+    """
+
+    def __init__(self):
+        self.pool = KernelPool()
+        self.sessions = KernelRegistry()
+
+    def start(self) -> None:
+        self.pool.start()
+        self.sessions.start()
+
+    def start_session(self, session_id: str) -> bool:
+        """Gives the session a kernel. Returns False if it already has one."""
+        if session_id in self.sessions: return False
+        self.sessions.add(session_id, self.pool.acquire())
+        return True
+
+    def has_session(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    def eviction_reason(self, session_id: str) -> Optional[str]:
+        return self.sessions.eviction_reason(session_id)
+
+    def end_session(self, session_id: str) -> None:
+        handle = self.sessions.pop(session_id)
+        if handle: shutdown_kernel(handle)
+
+    def execute(self, session_id: str, script: str, timeout: float) -> Optional[Tuple[str, str]]:
+        """Runs `script` in the session's kernel and returns (stdout, stderr), or None if there is no such session."""
+        with self.sessions.lease(session_id) as handle:
+            if handle is None: return None
+            execution = IOPUB_DISPATCHER.execute(handle[1], script)
+            if not execution.wait(timeout):
+                IOPUB_DISPATCHER.cancel(execution)
+                execution.stderr.append(timeout_message(timeout))
+            return execution.output()
+
+    def stream(self, session_id: str, script: str, timeout: float) -> Iterator[Event]:
+        """
+        Runs `script` and yields ('stream' | 'error', payload) events as the
+        kernel produces them, ('keepalive', None) while it is quiet, and a
+        final ('status', {'status': 'ok' | 'error' | 'timeout' | 'expired', ...}).
+        """
+        with self.sessions.lease(session_id) as handle:
+            if handle is None:
+                yield 'status', {'status': 'expired', 'droppedChars': 0}; return
+            output = OutputStream()
+            execution = IOPUB_DISPATCHER.execute(handle[1], script, on_message=output.on_message)
+            deadline, status = time.monotonic() + timeout, 'ok'
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        status = 'timeout'
+                        yield 'stream', {'name': 'stderr', 'text': timeout_message(timeout)}
+                        break
+                    events = output.next_events(min(remaining, KEEPALIVE_SECONDS))
+                    if not events and not output.finished: yield 'keepalive', None
+                    for event, payload in events:
+                        if event == 'error': status = 'error'
+                        yield event, payload
+                    if output.finished and not events: break
+            finally:
+                IOPUB_DISPATCHER.cancel(execution)
+            yield 'status', {'status': status, 'droppedChars': output.dropped_chars}
+
+    def stats(self) -> Dict:
+        return {'kernel_pool': self.pool.stats(), 'sessions': self.sessions.stats()}
+
+
+class RemoteKernelService:
+    """
+    Client side of the kernel broker. Every web worker process talks to the
+    same broker, so a session started through one worker can be used from
+    any other. Each thread keeps its own connection; a connection is dropped
+    whenever a call does not run to completion, so a reply can never be read
+    by the wrong caller. Without an explicit `authkey`, the broker's key is
+    read for every new connection, so a restarted broker's new key is used.
+    """
+
+    def __init__(self, address: str, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def start(self) -> None:
+        pass  # The broker owns the pool and the reaper.
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey or read_authkey(self.address))
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try: conn.close()
+            except OSError: pass
+
+    def _call(self, op: str, *args):
+        try:
+            conn = self._connection()
+            conn.send((op, args))
+            kind, value = conn.recv()
+        except (OSError, EOFError, AuthenticationError) as e:
+            self._drop_connection()
+            raise ConnectionError(f"Kernel broker unavailable at {self.address}: {e}")
+        if kind == "error": raise RuntimeError(value)
+        return value
+
+    def start_session(self, session_id: str) -> bool:
+        return self._call("start_session", session_id)
+
+    def has_session(self, session_id: str) -> bool:
+        return self._call("has_session", session_id)
+
+    def eviction_reason(self, session_id: str) -> Optional[str]:
+        return self._call("eviction_reason", session_id)
+
+    def end_session(self, session_id: str) -> None:
+        self._call("end_session", session_id)
+
+    def execute(self, session_id: str, script: str, timeout: float) -> Optional[Tuple[str, str]]:
+        result = self._call("execute", session_id, script, timeout)
+        return tuple(result) if result is not None else None
+
+    def stream(self, session_id: str, script: str, timeout: float) -> Iterator[Event]:
+        finished = False
+        try:
+            conn = self._connection()
+            conn.send(("stream", (session_id, script, timeout)))
+            while True:
+                kind, value = conn.recv()
+                if kind == "error": raise RuntimeError(value)
+                event, payload = value
+                yield event, payload
+                if event == 'status':
+                    finished = True; return
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise ConnectionError(f"Kernel broker unavailable at {self.address}: {e}")
+        finally:
+            # An abandoned stream leaves events in flight on this connection.
+            if not finished: self._drop_connection()
+
+    def stats(self) -> Dict:
+        return self._call("stats")
+
+
+def create_kernel_service():
+    if KERNEL_BROKER.startswith("unix:"): return RemoteKernelService(KERNEL_BROKER[len("unix:"):])
+    if KERNEL_BROKER: raise ValueError(f"Unsupported KERNEL_BROKER address: {KERNEL_BROKER!r} (expected unix:/path)")
+    return LocalKernelService()
@@ -0,0 +1,44 @@
+# backend/utils/paging.py
+
+import base64
+import json
+from typing import List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: str, arity: int) -> List:
+    """Raises ValueError for anything that is not a cursor of the expected shape."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != arity: raise ValueError("Invalid cursor.")
+    return values
+
+
+def page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """'a,b' -> ['a', 'b']; None means every field. Raises ValueError for unknown names."""
+    if not fields: return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown: raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return names
+
+
+def parse_sort(sort: Optional[str], allowed: Sequence[str], default: str) -> Tuple[str, bool]:
+    """'-name' -> ('name', True). Returns (field, descending)."""
+    sort = sort or default
+    field, descending = (sort[1:], True) if sort.startswith("-") else (sort, False)
+    if field not in allowed: raise ValueError(f"Cannot sort by '{field}'. Allowed: {', '.join(allowed)}.")
+    return field, descending
@@ -0,0 +1,96 @@
+# backend/utils/question_bank.py
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# --- Configuration ---
+QUESTIONS_BASE_PATH = Path(__file__).resolve().parent.parent / "data" / "questions"
+
+
+def serialize_question(question: Dict) -> str:
+    # Same shape Flask's jsonify produces for the question list (sorted keys, compact).
+    return json.dumps(question, sort_keys=True, separators=(",", ":"))
+
+
+def content_hash(serialized: str) -> str:
+    """Hash of a question's canonical serialization; equal hashes mean equal content."""
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class LevelBank:
+    """One parsed questions.json with lookup indexes and its pre-serialized payload."""
+
+    __slots__ = ("signature", "questions", "by_id", "parts", "serialized", "payload", "hashes")
+
+    def __init__(self, signature: Tuple[int, int], questions: List[Dict], serialized: Optional[List[str]] = None):
+        self.signature = signature
+        self.questions = questions
+        self.by_id: Dict[str, Dict] = {}
+        self.parts: Dict[Tuple[str, str], Dict] = {}
+        for question in questions:
+            # First match wins, as with the linear scans this replaces.
+            self.by_id.setdefault(question.get('id'), question)
+            for part in question.get('parts', []) or []:
+                self.parts.setdefault((question.get('id'), part.get('part_id')), part)
+        self.serialized = serialized if serialized is not None else [serialize_question(q) for q in questions]
+        self.payload = "[" + ",".join(self.serialized) + "]"
+        self.hashes: Dict[str, str] = {}
+        for question, text in zip(questions, self.serialized):
+            self.hashes.setdefault(question.get('id'), content_hash(text))
+
+
+class QuestionBank:
+    """
+    Process-wide cache of question files keyed by (subject, level). Each
+    lookup stats the file and reloads it if its mtime or size changed; the
+    admin routes also invalidate explicitly after writing a bank.
+    """
+
+    def __init__(self, base_path: Path = QUESTIONS_BASE_PATH):
+        self.base_path = base_path
+        self._levels: Dict[Tuple[str, str], LevelBank] = {}
+        self._lock = threading.Lock()
+
+    def level(self, subject: str, level: Union[int, str]) -> LevelBank:
+        """Returns the indexed bank for a level. Raises FileNotFoundError if it has no questions.json."""
+        key = (subject, str(level))
+        path = self.base_path / subject / f"level{level}" / "questions.json"
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            bank = self._levels.get(key)
+            if bank and bank.signature == signature: return bank
+        with open(path, 'r', encoding='utf-8') as f:
+            bank = LevelBank(signature, json.load(f))
+        with self._lock: self._levels[key] = bank
+        return bank
+
+    def put(self, subject: str, level: Union[int, str], bank: LevelBank) -> None:
+        """Installs a bank that was just written, so the next lookup does not re-read the file."""
+        with self._lock: self._levels[(subject, str(level))] = bank
+
+    def find(self, subject: str, level: Union[int, str], question_id: str, part_id: Optional[str] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Returns (question, part) by id. Without a part id, or if the part is
+        not found, the question itself stands in for the part.
+        """
+        bank = self.level(subject, level)
+        question = bank.by_id.get(question_id)
+        if question is None: return None, None
+        if not part_id: return question, question
+        return question, bank.parts.get((question_id, part_id), question)
+
+    def invalidate(self, subject: Optional[str] = None, level: Optional[Union[int, str]] = None) -> None:
+        """Drops one level, every level of a subject, or the whole cache."""
+        with self._lock:
+            if subject is None: self._levels.clear()
+            elif level is None:
+                for key in [k for k in self._levels if k[0] == subject]: del self._levels[key]
+            else: self._levels.pop((subject, str(level)), None)
+
+
+QUESTION_BANK = QuestionBank()
@@ -0,0 +1,218 @@
+# backend/utils/question_parsers.py
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import pandas as pd
+from openpyxl import load_workbook
+
+PathLike = Union[str, Path]
+# Called with (rows read, total rows or None) while a sheet is being read.
+Progress = Optional[Callable[[int, Optional[int]], None]]
+PROGRESS_EVERY_ROWS = 2000
+
+# --- Configuration ---
+SPEECH_INPUT_ROOT = "/home/student/Desktop/PS_SOFTWARE/PS/backend/data/datasets/Speech-Recognition/input/"
+SPEECH_SOLUTION_ROOT = "/home/student/Desktop/PS_SOFTWARE/PS/backend/data/datasets/Speech-Recognition/solution/"
+
+
+# --- Reading ---
+
+def read_sheet(path: PathLike, progress: Progress = None) -> pd.DataFrame:
+    """
+    Loads the first sheet of a workbook (or a CSV) with every cell kept as
+    the Python value it was stored as. Workbooks are streamed row by row in
+    openpyxl's read-only mode and fully blank rows are dropped.
+    """
+    path = str(path)
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, dtype=object, on_bad_lines="skip")
+        if progress: progress(len(df), len(df))
+        return df
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # From the sheet's dimension record; absent in some generated files.
+        total = sheet.max_row - 1 if sheet.max_row else None
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None: return pd.DataFrame()
+        columns = [str(name).strip() if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        records, count = [], 0
+        for count, row in enumerate(rows, 1):
+            if any(value is not None and value != "" for value in row): records.append(row)
+            if progress and count % PROGRESS_EVERY_ROWS == 0: progress(count, total)
+        if progress: progress(count, total)
+    finally:
+        workbook.close()
+    return pd.DataFrame.from_records(records, columns=columns, coerce_float=False).astype(object)
+
+
+# --- Column-wise normalization ---
+
+def _present(df: pd.DataFrame, column: str) -> pd.Series:
+    """True where the cell has a value."""
+    if column not in df: return pd.Series(False, index=df.index)
+    return df[column].notna() & (df[column].astype(str).str.strip() != "")
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    """Stripped text of a column; missing columns and empty cells become ''."""
+    if column not in df: return pd.Series("", index=df.index, dtype=object)
+    values = df[column]
+    return values.where(values.isna(), values.astype(str).str.strip()).fillna("")
+
+
+def _number(df: pd.DataFrame, column: str) -> pd.Series:
+    """Numeric value of a column, NaN where it is missing or not a number."""
+    return pd.to_numeric(_text(df, column).replace("", None), errors="coerce")
+
+
+def _records(columns: Dict[str, pd.Series], optional: Dict[str, pd.Series]) -> List[Dict]:
+    # Builds one dict per row; `optional` keys are only set where their mask column is True.
+    names = list(columns)
+    masks = [optional[name].tolist() if name in optional else None for name in names]
+    out = []
+    for i, row in enumerate(zip(*(columns[name].tolist() for name in names))):
+        out.append({name: value for name, value, mask in zip(names, row, masks) if mask is None or mask[i]})
+    return out
+
+
+# --- Parsers ---
+
+def parse_ml(path: PathLike, progress: Progress = None) -> List[Dict]:
+    """Multi-part ML tasks: one row per part, grouped by task id in order of first appearance."""
+    df = read_sheet(path, progress)
+    ids = _text(df, "id")
+    df = df[ids != ""]
+    ids = ids[ids != ""]
+    if df.empty: return []
+
+    # Task headers come from each task's first row; datasets from the last row that sets them.
+    first = pd.DataFrame({"title": _text(df, "title"), "description": _text(df, "description")}).groupby(ids, sort=False).first()
+    datasets = pd.DataFrame({
+        "train": _text(df, "train_dataset").where(_present(df, "train_dataset")),
+        "test": _text(df, "test_dataset").where(_present(df, "test_dataset")),
+    }).groupby(ids, sort=False).last()
+
+    part_ids = _text(df, "part_id")
+    has_part = part_ids != ""
+    parts = df[has_part]
+    numbers = {field: _number(parts, field) for field in ("expected_value", "similarity_threshold", "tolerance")}
+    key_columns = _text(parts, "key_columns").map(lambda text: [c.strip() for c in text.split(",") if c.strip()])
+    part_records = _records(
+        {
+            "part_id": part_ids[has_part], "type": _text(parts, "type"), "description": _text(parts, "part_description"),
+            "expected_text": _text(parts, "expected_text"), "evaluation_label": _text(parts, "evaluation_label"),
+            "placeholder_filename": _text(parts, "placeholder_filename"), "solution_file": _text(parts, "solution_file"),
+            "key_columns": key_columns, **numbers,
+        },
+        {
+            **{field: _present(parts, field) for field in ("expected_text", "evaluation_label", "placeholder_filename", "solution_file", "key_columns")},
+            **{field: values.notna() for field, values in numbers.items()},
+        },
+    )
+
+    tasks = {}
+    for task_id, title, description, train, test in zip(first.index, first["title"], first["description"], datasets["train"], datasets["test"]):
+        task_datasets = {name: value for name, value in (("train", train), ("test", test)) if pd.notna(value)}
+        tasks[task_id] = {"id": task_id, "title": title, "description": description, "datasets": task_datasets, "parts": []}
+    for task_id, part in zip(ids[has_part], part_records):
+        tasks[task_id]["parts"].append(part)
+    return list(tasks.values())
+
+
+def parse_ds(path: PathLike, progress: Progress = None) -> List[Dict]:
+    """DS questions: one row per test case, grouped by question id (sorted, as before)."""
+    df = read_sheet(path, progress)
+    ids = _text(df, "id")
+    frame = pd.DataFrame({
+        "id": ids, "title": _text(df, "title"), "description": _text(df, "description"),
+        "input": _text(df, "input"), "output": _text(df, "output"),
+    })[ids != ""]
+    questions = []
+    # Grouped on the raw cell values so numeric ids keep numeric order (2 before 10).
+    for _, group in frame.groupby(df.loc[frame.index, "id"], sort=True):
+        questions.append({
+            "id": group["id"].iat[0], "title": group["title"].iat[0], "description": group["description"].iat[0],
+            "test_cases": [{"input": i, "output": o} for i, o in zip(group["input"], group["output"])],
+        })
+    return questions
+
+
+def parse_speech_recognition(path: PathLike, progress: Progress = None) -> List[Dict]:
+    """Speech Recognition tasks: one row per task, each with a single csv_similarity part."""
+    df = read_sheet(path, progress)
+    ids, titles, tasks_text = _text(df, "S.No"), _text(df, "Scenario"), _text(df, "Task")
+    inputs = _text(df, "Input File").map(lambda name: SPEECH_INPUT_ROOT + name if name else "")
+    outputs = _text(df, "Output File").map(lambda names: [SPEECH_SOLUTION_ROOT + n.strip() for n in names.split(",")] if names else [])
+    return [{
+        "id": task_id, "title": title, "description": task,
+        "datasets": {"input_file": input_path},
+        "parts": [{
+            "part_id": task_id, "type": "csv_similarity", "description": task,
+            "solution_file": output_files if len(output_files) > 1 else (output_files[0] if output_files else ""),
+        }],
+    } for task_id, title, task, input_path, output_files in zip(ids, titles, tasks_text, inputs, outputs)]
+
+
+def parse_standard(path: PathLike, progress: Progress = None) -> List[Dict]:
+    """The standardized multi-part template (part_type, '|'-separated key_columns)."""
+    df = read_sheet(path, progress)
+    ids = _text(df, "id")
+    df, ids = df[ids != ""], ids[ids != ""]
+    first = pd.DataFrame({"title": _text(df, "title"), "description": _text(df, "description")}).groupby(ids, sort=True).first()
+    part_ids = _text(df, "part_id")
+    has_part = part_ids != ""
+    parts = df[has_part]
+    optional = ("expected_text", "train_file", "test_file", "student_file", "placeholder_filename", "solution_file")
+    threshold = _number(parts, "similarity_threshold")
+    part_records = _records(
+        {
+            "part_id": part_ids[has_part], "type": _text(parts, "part_type"), "description": _text(parts, "part_description"),
+            "expected_text": _text(parts, "expected_text"), "similarity_threshold": threshold,
+            **{field: _text(parts, field) for field in optional[1:]},
+            "key_columns": _text(parts, "key_columns").map(lambda text: [k.strip() for k in text.split("|")]),
+        },
+        {**{field: _present(parts, field) for field in optional + ("key_columns",)}, "similarity_threshold": threshold.fillna(0) != 0},
+    )
+    grouped: Dict[str, List[Dict]] = {}
+    for task_id, part in zip(ids[has_part], part_records): grouped.setdefault(task_id, []).append(part)
+    tasks = []
+    for task_id, title, description in zip(first.index, first["title"], first["description"]):
+        task = {"id": task_id, "title": title, "description": description}
+        if grouped.get(task_id): task["parts"] = grouped[task_id]
+        tasks.append(task)
+    return tasks
+
+
+PARSERS: Dict[str, Callable[..., List[Dict]]] = {
+    "ml": parse_ml,
+    "ds": parse_ds,
+    "Speech Recognition": parse_speech_recognition,
+}
+
+
+def validate_questions(subject: str, questions: List[Dict]) -> List[str]:
+    """Problems that would make a parsed question unusable in the IDE, one message per problem."""
+    problems = []
+    for question in questions:
+        label = f"Question '{question.get('id')}'"
+        if not question.get("title"): problems.append(f"{label} has no title.")
+        if subject == "ds":
+            if not question.get("test_cases"): problems.append(f"{label} has no test cases.")
+            continue
+        if not question.get("parts"): problems.append(f"{label} has no parts.")
+        for part in question.get("parts", []):
+            if not part.get("type"): problems.append(f"{label}, part '{part.get('part_id')}' has no type.")
+    return problems
+
+
+def convert(parser: Callable[[PathLike], List[Dict]], input_file: PathLike, output_file: PathLike) -> int:
+    """Parses `input_file` and writes the questions to `output_file` as JSON. Returns the question count."""
+    questions = parser(input_file)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(questions, f, indent=2, ensure_ascii=False)
+    print(f"✅ Converted {input_file} → {output_file} ({len(questions)} questions)")
+    return len(questions)
+
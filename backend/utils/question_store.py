@@ -0,0 +1,190 @@
+# backend/utils/question_store.py
+
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from utils.db import connect, transaction
+from utils.question_bank import QUESTION_BANK, LevelBank, QuestionBank, content_hash, serialize_question
+from utils.solution_cache import SOLUTION_CACHE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_versions (
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    hash TEXT,
+    body TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (subject, level, question_id, version)
+);
+CREATE TABLE IF NOT EXISTS question_levels (
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (subject, level)
+);
+"""
+
+
+def _solution_files(question: Dict) -> List[str]:
+    """Every solution file a question's parts point at (strings or lists of strings)."""
+    files = []
+    for part in [question] + list(question.get('parts', []) or []):
+        value = part.get('solution_file')
+        if isinstance(value, str) and value: files.append(value)
+        elif isinstance(value, list): files.extend(v for v in value if isinstance(v, str) and v)
+    return files
+
+
+def _entry(question: Dict) -> str:
+    # One question as json.dump(questions, f, indent=2) lays it out inside the top-level list.
+    return "\n".join("  " + line for line in json.dumps(question, indent=2).splitlines())
+
+
+class QuestionStore:
+    """
+    Writes question banks by diff. Each question is identified by its id and
+    compared by a content hash, so an upload only records the questions that
+    were added, changed or removed: those get a new row in the version
+    history (question_versions), the level's version is bumped, and only
+    their solution files are dropped from the solution cache. questions.json
+    stays the file every reader uses; it is left untouched when nothing
+    changed and appended to in place when questions are only added.
+    """
+
+    def __init__(self, bank: QuestionBank = QUESTION_BANK):
+        self.bank = bank
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        with self._lock:
+            if self._ready: return
+            connect().executescript(SCHEMA)
+            self._ready = True
+
+    def _current(self, subject: str, level: str) -> LevelBank:
+        try:
+            return self.bank.level(subject, level)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return LevelBank((0, 0), [])  # A missing or unreadable bank is replaced outright.
+
+    def upsert(self, subject: str, level: Union[int, str], questions: Iterable[Dict], remove_missing: bool = True) -> Dict:
+        """
+        Merges `questions` into a level. With remove_missing (a full upload),
+        questions not in the upload are removed and the upload's order is
+        kept; otherwise existing questions keep their place, changed ones are
+        replaced and new ones appended. Raises ValueError if a question has no
+        id or an id appears twice. Returns {added, changed, removed,
+        unchanged, version}.
+        """
+        self._open()
+        level = str(level)
+        incoming, seen = [], set()
+        for question in questions:
+            question_id = question.get('id')
+            if question_id in (None, ""): raise ValueError("Every question needs an id.")
+            if question_id in seen: raise ValueError(f"Question id '{question_id}' appears more than once.")
+            seen.add(question_id)
+            text = serialize_question(question)
+            incoming.append((question_id, question, text, content_hash(text)))
+
+        path = self.bank.base_path / subject / f"level{level}" / "questions.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.parent / ".questions.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # Another worker may be writing the same level.
+            current = self._current(subject, level)
+            added = [(qid, q, t, h) for qid, q, t, h in incoming if qid not in current.hashes]
+            changed = [(qid, q, t, h) for qid, q, t, h in incoming if qid in current.hashes and current.hashes[qid] != h]
+            removed = [qid for qid in current.hashes if qid not in seen] if remove_missing else []
+            counts = {"added": len(added), "changed": len(changed), "removed": len(removed),
+                      "unchanged": len(incoming) - len(added) - len(changed)}
+            if not (added or changed or removed):
+                counts["version"] = self.version(subject, level)
+                return counts
+
+            merged = self._merge(current, incoming, remove_missing)
+            self._write(path, current, merged, appended=[q for _, q, _, _ in added] if not (changed or removed) else None)
+            stat = os.stat(path)
+            self.bank.put(subject, level, LevelBank((stat.st_mtime_ns, stat.st_size), [q for q, _ in merged], [t for _, t in merged]))
+            counts["version"] = self._record(subject, level, current, added + changed, removed)
+
+        # Per-question invalidation: only the solutions of questions that changed or went away.
+        stale = set()
+        for question_id in [qid for qid, _, _, _ in changed] + removed:
+            stale.update(_solution_files(current.by_id[question_id]))
+        for solution_file in stale: SOLUTION_CACHE.invalidate(solution_file)
+        print(f"Question bank {subject}/level{level} v{counts['version']}: {counts['added']} added, "
+              f"{counts['changed']} changed, {counts['removed']} removed, {counts['unchanged']} unchanged.")
+        return counts
+
+    def _merge(self, current: LevelBank, incoming: List, remove_missing: bool) -> List:
+        """The level's new (question, serialized) list."""
+        if remove_missing: return [(q, t) for _, q, t, _ in incoming]
+        updates = {qid: (q, t) for qid, q, t, _ in incoming}
+        merged = [updates.pop(q.get('id'), (q, t)) for q, t in zip(current.questions, current.serialized)]
+        return merged + [(q, t) for qid, q, t, _ in incoming if qid in updates]
+
+    def _write(self, path: Path, current: LevelBank, merged: List, appended: Optional[List[Dict]]) -> None:
+        if appended and current.questions and path.exists():
+            # Pure additions: extend the file in place instead of rewriting the whole bank.
+            with open(path, "r+b") as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                f.seek(max(0, end - 64))
+                tail = f.read()
+                close = tail.rstrip().rfind(b"]")
+                if close >= 0:
+                    f.seek(end - len(tail) + len(tail[:close].rstrip()))
+                    f.write((",\n" + ",\n".join(_entry(q) for q in appended) + "\n]").encode("utf-8"))
+                    f.truncate()
+                    return
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([q for q, _ in merged], f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _record(self, subject: str, level: str, current: LevelBank, upserted: List, removed: List[str]) -> int:
+        now = datetime.now(timezone.utc).isoformat()
+        with transaction() as conn:
+            row = conn.execute("SELECT version FROM question_levels WHERE subject = ? AND level = ?", (subject, level)).fetchone()
+            rows = []
+            if row is not None:
+                version = row["version"] + 1
+            elif current.questions:
+                # First tracked write to a level that already has questions: those become version 1.
+                version = 2
+                rows = [(subject, level, str(q.get('id')), 1, content_hash(t), t, now) for q, t in zip(current.questions, current.serialized)]
+            else:
+                version = 1
+            rows += [(subject, level, str(qid), version, h, t, now) for qid, _, t, h in upserted]
+            rows += [(subject, level, str(qid), version, None, None, now) for qid in removed]
+            conn.executemany("INSERT OR REPLACE INTO question_versions (subject, level, question_id, version, hash, body, created_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO question_levels (subject, level, version, updated_at) VALUES (?, ?, ?, ?)",
+                         (subject, level, version, now))
+        return version
+
+    def version(self, subject: str, level: Union[int, str]) -> int:
+        """The level's current version; 0 if it has never been written through the store."""
+        self._open()
+        row = connect().execute("SELECT version FROM question_levels WHERE subject = ? AND level = ?", (subject, str(level))).fetchone()
+        return row["version"] if row else 0
+
+    def history(self, subject: str, level: Union[int, str], question_id: str) -> List[Dict]:
+        """Every recorded version of one question, oldest first; `question` is None where it was removed."""
+        self._open()
+        rows = connect().execute(
+            "SELECT version, hash, body, created_at FROM question_versions WHERE subject = ? AND level = ? AND question_id = ? ORDER BY version",
+            (subject, str(level), str(question_id)))
+        return [{"version": r["version"], "hash": r["hash"], "createdAt": r["created_at"],
+                 "question": json.loads(r["body"]) if r["body"] is not None else None} for r in rows]
+
+
+QUESTION_STORE = QuestionStore()
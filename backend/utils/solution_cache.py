@@ -0,0 +1,123 @@
+# backend/utils/solution_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from utils import solution_fingerprint
+from utils.solution_fingerprint import SolutionFingerprint
+
+# --- Configuration ---
+SOLUTION_CACHE_ENTRIES = int(os.getenv("SOLUTION_CACHE_ENTRIES", "64"))
+SOLUTION_CACHE_MAX_FILE_MB = int(os.getenv("SOLUTION_CACHE_MAX_FILE_MB", "64"))
+
+
+class CachedSolution:
+    """A parsed solution CSV plus its numeric block, shared read-only between requests."""
+
+    __slots__ = ("frame", "numeric_columns", "numeric_values")
+
+    def __init__(self, frame: pd.DataFrame, fingerprint: Optional[SolutionFingerprint] = None):
+        self.frame = frame
+        self.numeric_columns = frame.select_dtypes(include=np.number).columns
+        if fingerprint is not None and fingerprint.numeric_columns == [str(c) for c in self.numeric_columns]:
+            self.numeric_values = fingerprint.numeric  # Already extracted at ingest; read-only memory map.
+        else:
+            self.numeric_values = frame[self.numeric_columns].to_numpy()
+            self.numeric_values.flags.writeable = False
+
+
+class SolutionCache:
+    """
+    Bounded LRU cache of parsed solution CSVs. Entries are keyed by the
+    resolved path and validated against the file's mtime and size on every
+    lookup, so a replaced solution is re-read even without an explicit
+    invalidate(). Files larger than `max_file_bytes` are never cached.
+    It also hands out each solution's fingerprint (see
+    utils/solution_fingerprint.py), building it on first use when the
+    question upload did not.
+    """
+
+    def __init__(self, max_entries: int = SOLUTION_CACHE_ENTRIES, max_file_bytes: int = SOLUTION_CACHE_MAX_FILE_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_file_bytes = max_file_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], CachedSolution]]" = OrderedDict()
+        self._fingerprints: Dict[str, Tuple[Tuple[int, int], SolutionFingerprint]] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, path: Union[Path, str]) -> CachedSolution:
+        """Returns the parsed solution at `path`, reading it only if it is not cached or has changed."""
+        key = str(Path(path).resolve())
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._misses += 1
+        solution = CachedSolution(pd.read_csv(key), self._stored_fingerprint(key, signature))
+        if stat.st_size <= self.max_file_bytes:
+            with self._lock:
+                self._entries[key] = (signature, solution)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+        return solution
+
+    def _stored_fingerprint(self, key: str, signature: Tuple[int, int]) -> Optional[SolutionFingerprint]:
+        with self._lock:
+            entry = self._fingerprints.get(key)
+            if entry and entry[0] == signature: return entry[1]
+        fingerprint = solution_fingerprint.load(key)
+        if fingerprint is not None:
+            with self._lock: self._fingerprints[key] = (signature, fingerprint)
+        return fingerprint
+
+    def fingerprint(self, path: Union[Path, str], key_column: Optional[str] = None) -> Optional[SolutionFingerprint]:
+        """
+        The solution's fingerprint, with `key_column` indexed. Built from the
+        cached frame if it is missing or stale; None if it cannot be built.
+        """
+        key = str(Path(path).resolve())
+        try:
+            stat = os.stat(key)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            fingerprint = self._stored_fingerprint(key, signature)
+            if fingerprint is not None and (not key_column or key_column in fingerprint.meta["keys"]): return fingerprint
+            with self._lock: build_lock = self._build_locks.setdefault(key, threading.Lock())
+            with build_lock:
+                # One thread builds; the others find its result when they get the lock.
+                fingerprint = self._stored_fingerprint(key, signature)
+                if fingerprint is None:
+                    fingerprint = solution_fingerprint.build(key, self.get(key).frame, [key_column] if key_column else [])
+                    with self._lock: self._fingerprints[key] = (signature, fingerprint)
+                elif key_column and key_column not in fingerprint.meta["keys"]:
+                    solution_fingerprint.add_key(fingerprint, self.get(key).frame, key_column)
+            return fingerprint
+        except Exception as e:
+            print(f"Warning: no fingerprint for solution {key}: {e}")
+            return None
+
+    def invalidate(self, path: Optional[Union[Path, str]] = None) -> None:
+        """Drops one cached solution, or all of them when no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._fingerprints.clear()
+            else:
+                self._entries.pop(str(Path(path).resolve()), None)
+                self._fingerprints.pop(str(Path(path).resolve()), None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self._hits, "misses": self._misses}
+
+
+SOLUTION_CACHE = SolutionCache()
@@ -0,0 +1,240 @@
+# backend/utils/solution_fingerprint.py
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from utils.dataset_cache import CACHE_ROOT
+
+# --- Configuration ---
+FINGERPRINT_ROOT = CACHE_ROOT / "solutions"
+FINGERPRINT_VERSION = 1
+
+
+def file_sha256(path: Union[Path, str]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""): digest.update(block)
+    return digest.hexdigest()
+
+
+def _signature(path: Path) -> Dict:
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _directory(path: Path) -> Path:
+    return FINGERPRINT_ROOT / hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:20]
+
+
+def _tmp_suffix() -> str:
+    # Unique per thread too: two threads of one worker may build the same fingerprint.
+    return f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _save_array(target: Path, array: np.ndarray) -> None:
+    tmp_path = target.with_name(f"{target.name}{_tmp_suffix()}")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, target)
+
+
+class SolutionFingerprint:
+    """
+    What grading needs to know about one solution CSV, computed once: shape,
+    columns, dtypes, the file's sha256, its numeric block as an .npy and a
+    sorted index per key column. Arrays are memory-mapped on first use.
+    """
+
+    __slots__ = ("directory", "meta", "_numeric", "_keys")
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self._numeric: Optional[np.ndarray] = None
+        self._keys: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return tuple(self.meta["shape"])
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return self.meta["numeric_columns"]
+
+    @property
+    def numeric(self) -> np.ndarray:
+        """The solution's numeric columns as one read-only (rows, columns) array."""
+        if self._numeric is None: self._numeric = np.load(self.directory / "numeric.npy", mmap_mode="r")
+        return self._numeric
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        """One numeric column, or None if the column is not numeric."""
+        if name not in self.numeric_columns: return None
+        return self.numeric[:, self.numeric_columns.index(name)]
+
+    def key_index(self, column: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(sorted key values, row of each sorted value) for a unique numeric key without NaNs; None otherwise."""
+        info = self.meta["keys"].get(column)
+        if not info or not info["usable"]: return None
+        if column not in self._keys:
+            self._keys[column] = (np.load(self.directory / info["sorted"], mmap_mode="r"),
+                                  np.load(self.directory / info["order"], mmap_mode="r"))
+        return self._keys[column]
+
+    def lookup(self, column: str, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matches student key values against a unique solution key: returns
+        (mask of keys found, solution row of each found key), the rows an
+        inner merge on the key would pair up. The column must have a key index.
+        """
+        sorted_keys, order = self.key_index(column)
+        if not len(sorted_keys): return np.zeros(len(keys), dtype=bool), np.empty(0, dtype=np.intp)
+        start = self.meta["keys"][column].get("range_start")
+        if start is not None and keys.dtype.kind in "iu":
+            # Keys are start, start+1, ...: the position is arithmetic.
+            positions = keys - start
+            found = (positions >= 0) & (positions < len(sorted_keys))
+            return found, order[positions[found]]
+        # Binary search is much faster over ascending needles.
+        needle_order = np.argsort(keys, kind="stable")
+        positions = np.empty(len(keys), dtype=np.intp)
+        positions[needle_order] = np.searchsorted(sorted_keys, keys[needle_order])
+        positions = positions.clip(0, len(sorted_keys) - 1)
+        found = sorted_keys[positions] == keys
+        return found, order[positions[found]]
+
+    def identical_to(self, path: Union[Path, str]) -> bool:
+        """True if `path` has exactly the solution's bytes (sizes are compared first, so mismatches are cheap)."""
+        return os.path.getsize(path) == self.meta["source"]["size"] and file_sha256(path) == self.meta["sha256"]
+
+    def self_match_is_perfect(self, key_columns=None) -> bool:
+        """
+        Whether compare_csvs would score the solution against itself as 1.0:
+        the guarantee the byte-identical fast path relies on. It does not
+        hold when numeric cells are NaN (np.isclose(nan, nan) is False) or
+        when a merge key repeats.
+        """
+        if key_columns and len(key_columns) == 2:
+            merge_key, compare_col = key_columns
+            return (merge_key != compare_col and compare_col in self.numeric_columns
+                    and self.key_index(merge_key) is not None and self.meta["nan_free"].get(compare_col, False))
+        if not self.numeric_columns: return True  # Text-only solutions are compared with DataFrame.equals.
+        return all(self.meta["nan_free"].values())
+
+
+def _key_files(directory: Path, frame: pd.DataFrame, column: str) -> Dict:
+    values = frame[column]
+    usable = bool(pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+                  and not values.isna().any() and values.is_unique)
+    info = {"usable": usable}
+    if usable:
+        array = values.to_numpy()
+        order = np.argsort(array, kind="stable")
+        stem = hashlib.sha1(column.encode("utf-8")).hexdigest()[:12]
+        info["sorted"], info["order"] = f"key-{stem}-sorted.npy", f"key-{stem}-order.npy"
+        _save_array(directory / info["sorted"], array[order])
+        _save_array(directory / info["order"], order)
+        if array.dtype.kind in "iu" and len(array) and int(array[order[-1]]) - int(array[order[0]]) == len(array) - 1:
+            info["range_start"] = int(array[order[0]])
+    return info
+
+
+def _write_meta(directory: Path, meta: Dict) -> None:
+    tmp_path = directory / f"meta.json{_tmp_suffix()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, directory / "meta.json")
+
+
+def load(path: Union[Path, str]) -> Optional[SolutionFingerprint]:
+    """The stored fingerprint of a solution file, or None if there is none or the file has changed since."""
+    path = Path(path)
+    directory = _directory(path)
+    try:
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get("version") != FINGERPRINT_VERSION or meta.get("source") != _signature(path): return None
+    return SolutionFingerprint(directory, meta)
+
+
+def build(path: Union[Path, str], frame: Optional[pd.DataFrame] = None, key_columns: Iterable[str] = ()) -> SolutionFingerprint:
+    """
+    Fingerprints a solution file, parsing it unless the parsed `frame` is
+    passed in. The metadata is written last, so readers never see a
+    fingerprint whose arrays are incomplete.
+    """
+    path = Path(path)
+    source, sha256 = _signature(path), file_sha256(path)
+    if frame is None: frame = pd.read_csv(path)
+    directory = _directory(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    numeric_columns = list(frame.select_dtypes(include=np.number).columns)
+    numeric = frame[numeric_columns].to_numpy()
+    _save_array(directory / "numeric.npy", numeric)
+    meta = {
+        "version": FINGERPRINT_VERSION, "path": str(path.resolve()), "source": source, "sha256": sha256,
+        "shape": list(frame.shape), "columns": [str(c) for c in frame.columns],
+        "dtypes": {str(c): str(t) for c, t in frame.dtypes.items()}, "numeric_columns": [str(c) for c in numeric_columns],
+        "nan_free": {str(c): not bool(frame[c].isna().any()) for c in numeric_columns},
+        "keys": {column: _key_files(directory, frame, column) for column in dict.fromkeys(key_columns) if column in frame.columns},
+    }
+    _write_meta(directory, meta)
+    return SolutionFingerprint(directory, meta)
+
+
+def add_key(fingerprint: SolutionFingerprint, frame: pd.DataFrame, column: str) -> None:
+    """Indexes one more key column of an existing fingerprint (e.g. one a part started using after ingest)."""
+    if column in fingerprint.meta["keys"] or column not in frame.columns: return
+    meta = json.loads(json.dumps(fingerprint.meta))
+    meta["keys"][column] = _key_files(fingerprint.directory, frame, column)
+    _write_meta(fingerprint.directory, meta)
+    fingerprint.meta = meta
+
+
+def _solution_references(questions: Iterable[Dict]) -> Dict[str, List[str]]:
+    """solution file -> key columns used with it, for every part of a question bank."""
+    references: Dict[str, List[str]] = {}
+    for question in questions:
+        for part in [question] + list(question.get("parts", []) or []):
+            files = part.get("solution_file")
+            files = [files] if isinstance(files, str) else [f for f in files or [] if isinstance(f, str)]
+            key_columns = part.get("key_columns") or []
+            for solution_file in filter(None, files):
+                keys = references.setdefault(solution_file, [])
+                if len(key_columns) == 2 and key_columns[0] not in keys: keys.append(key_columns[0])
+    return references
+
+
+def register_question_solutions(questions: Iterable[Dict]) -> List[Path]:
+    """Fingerprints every solution file a question bank refers to. Returns the fingerprint directories."""
+    built = []
+    for solution_file, key_columns in _solution_references(questions).items():
+        path = Path(solution_file)
+        if not path.is_file(): continue
+        fingerprint = load(path)
+        if fingerprint is None or any(k not in fingerprint.meta["keys"] for k in key_columns):
+            fingerprint = build(path, key_columns=key_columns)
+        built.append(fingerprint.directory)
+    return built
+
+
+if __name__ == "__main__":
+    # python -m utils.solution_fingerprint build  (every solution referenced by data/questions)
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        questions_root = Path(__file__).resolve().parent.parent / "data" / "questions"
+        count = 0
+        for bank in sorted(questions_root.glob("*/level*/questions.json")):
+            with open(bank, "r", encoding="utf-8") as f:
+                count += len(register_question_solutions(json.load(f)))
+        print(f"{count} solution fingerprints under {FINGERPRINT_ROOT}.")
+    else:
+        print("usage: python -m utils.solution_fingerprint build")
+        sys.exit(1)
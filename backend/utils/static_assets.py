@@ -0,0 +1,100 @@
+# backend/utils/static_assets.py
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+from typing import Dict, Optional
+from flask import Response, jsonify, request
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are built.
+    brotli = None
+
+# --- Configuration ---
+# Vite emits bundles as assets/<name>-<hash>.<ext>; those never change under the same name.
+HASHED_ASSET = re.compile(r"(^|/)assets/.+[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+# Missing paths under the build's assets folder or ending in one of these extensions get a 404, not index.html.
+ASSET_DIR = "assets/"
+ASSET_EXTENSIONS = frozenset({
+    "js", "mjs", "css", "map", "html", "json", "txt", "xml", "webmanifest", "wasm", "ico", "png", "jpg", "jpeg", "gif",
+    "svg", "webp", "avif", "woff", "woff2", "ttf", "otf", "eot", "mp3", "wav", "mp4", "webm",
+})
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml", "application/wasm")
+MIN_COMPRESS_BYTES = 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    """One file from the build with its precomputed encodings."""
+
+    __slots__ = ("mimetype", "etag", "cache_control", "variants")
+
+    def __init__(self, rel_path: str, data: bytes):
+        self.mimetype = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.cache_control = IMMUTABLE if HASHED_ASSET.search(rel_path) else REVALIDATE
+        self.variants: Dict[str, bytes] = {"identity": data}
+        if len(data) >= MIN_COMPRESS_BYTES and self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gzipped) < len(data): self.variants["gzip"] = gzipped
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data): self.variants["br"] = compressed
+
+
+class StaticAssets:
+    """
+    Serves the production frontend build from memory. The whole dist folder
+    is read and compressed once at startup, so a request is a dict lookup:
+    no filesystem checks and no per-request compression. Unknown paths fall
+    back to index.html for client-side routing, so routes with dotted ids or
+    usernames still load; paths that look like build files or belong to the
+    API get a real 404.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.assets: Dict[str, Asset] = {}
+        self.extensions = set(ASSET_EXTENSIONS)
+        if not root.is_dir():
+            print(f"Warning: frontend build not found at {root}; only the API will be served.")
+            return
+        for file in sorted(p for p in root.rglob("*") if p.is_file()):
+            rel_path = file.relative_to(root).as_posix()
+            self.assets[rel_path] = Asset(rel_path, file.read_bytes())
+            if "." in file.name: self.extensions.add(file.suffix[1:].lower())
+        original = sum(len(a.variants["identity"]) for a in self.assets.values())
+        print(f"Loaded {len(self.assets)} frontend files ({original // 1024} KiB, brotli {'on' if brotli else 'off'}).")
+
+    def serve(self, path: str) -> Response:
+        asset = self.assets.get(path)
+        if asset is None:
+            if path == "api" or path.startswith("api/") or self._looks_like_asset(path):
+                return jsonify({"message": "Not found."}), 404
+            asset = self.assets.get("index.html")
+            if asset is None: return jsonify({"message": "Frontend build not found."}), 404
+        return self._respond(asset)
+
+    def _looks_like_asset(self, path: str) -> bool:
+        name = path.rsplit("/", 1)[-1]
+        return path.startswith(ASSET_DIR) or ("." in name and name.rsplit(".", 1)[1].lower() in self.extensions)
+
+    def _respond(self, asset: Asset) -> Response:
+        encoding = self._choose_encoding(asset)
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != "identity": response.headers["Content-Encoding"] = encoding
+        if len(asset.variants) > 1: response.vary.add("Accept-Encoding")
+        # Each encoding is a different representation and so gets its own strong ETag.
+        response.set_etag(asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}")
+        response.headers["Cache-Control"] = asset.cache_control
+        return response.make_conditional(request)
+
+    def _choose_encoding(self, asset: Asset) -> str:
+        accepted = request.accept_encodings
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted[encoding]: return encoding
+        return "identity"
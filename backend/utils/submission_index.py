@@ -0,0 +1,273 @@
+# backend/utils/submission_index.py
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.db import connect, snapshot, transaction
+from utils.paging import decode_cursor, encode_cursor, page_size
+from utils.submission_log import SUBMISSION_LOG, SubmissionLog
+
+# --- Configuration ---
+# Appends made by other worker processes reach this process's reads within this many seconds.
+RECONCILE_SECONDS = int(os.getenv("SUBMISSION_RECONCILE_SECONDS", "30"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submission_index (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    position INTEGER,
+    log_offset INTEGER
+);
+CREATE INDEX IF NOT EXISTS submission_index_level ON submission_index (subject, level, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS submission_index_time ON submission_index (timestamp DESC, id DESC);
+-- How far each user's files have been indexed: inode of the .jsonl log, byte offset after its last
+-- indexed line and its size when it was read, and the size and mtime of the legacy .json file.
+CREATE TABLE IF NOT EXISTS submission_sources (
+    username TEXT PRIMARY KEY,
+    log_inode INTEGER NOT NULL,
+    log_offset INTEGER NOT NULL,
+    legacy_signature TEXT NOT NULL,
+    log_size INTEGER NOT NULL DEFAULT -1
+);
+"""
+
+
+# Every record gets a row, so a user's history can be paged from the index. Records without
+# subject and level are stored with empty ones and left out of the admin views.
+LISTED = "subject != '' AND level != ''"
+USER_COLUMNS = (("position", "INTEGER"), ("log_offset", "INTEGER"))
+
+
+def _row(username: str, submission: Dict, position: int, log_offset: Optional[int]) -> Tuple:
+    subject, level = submission.get("subject"), submission.get("level")
+    subject, level = (subject, str(level)) if subject and level else ("", "")
+    return (username, subject, level, submission.get("status", "unknown"), submission.get("timestamp") or "", position, log_offset)
+
+
+class SubmissionIndex:
+    """
+    Materialized summary of every submission (who, subject, level, status,
+    when) kept in the application database, so the admin views query it
+    instead of reading every user's history. For each user it records how
+    far into their log it has read, in the same transaction as the rows.
+    Appends in this process are picked up by a listener. Opening reconciles
+    the index with the files, at a stat per user, and reads reconcile again
+    when the log directory changes (new users, compaction) or at most every
+    `reconcile_seconds`. A failed listener, a crash between log write and
+    index insert, or another worker process appending therefore only leaves
+    it behind for a while.
+    """
+
+    def __init__(self, log: SubmissionLog = SUBMISSION_LOG, reconcile_seconds: int = RECONCILE_SECONDS):
+        self.log = log
+        self.reconcile_seconds = reconcile_seconds
+        self._ready = False
+        self._lock = threading.Lock()
+        self._reconciled_at = 0.0
+        self._directory_mtime = None
+
+    def open(self) -> None:
+        """Creates the tables, indexes whatever the log holds beyond them and starts following appends."""
+        with self._lock:
+            if self._ready: return
+            connect().executescript(SCHEMA)
+            conn = connect()
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(submission_index)")}
+            missing = [(name, kind) for name, kind in USER_COLUMNS if name not in columns]
+            for name, kind in missing: conn.execute(f"ALTER TABLE submission_index ADD COLUMN {name} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS submission_index_user ON submission_index (username, timestamp, position)")
+            if "log_size" not in {row["name"] for row in conn.execute("PRAGMA table_info(submission_sources)")}:
+                # Unknown sizes (-1) make the next reconcile look at every user once.
+                conn.execute("ALTER TABLE submission_sources ADD COLUMN log_size INTEGER NOT NULL DEFAULT -1")
+            if missing or (not conn.execute("SELECT 1 FROM submission_sources LIMIT 1").fetchone()
+                           and conn.execute("SELECT 1 FROM submission_index LIMIT 1").fetchone()):
+                # Built before per-user offsets and positions were recorded: start over.
+                print(f"Indexed {self.rebuild()} submissions.")
+            else:
+                count = self.reconcile()
+                if count: print(f"Indexed {count} submissions.")
+            self._directory_mtime, self._reconciled_at = self._directory_state(), time.monotonic()
+            self.log.subscribe(self.record)
+            self._ready = True
+
+    def _directory_state(self) -> int:
+        try:
+            return self.log.base_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def refresh(self) -> None:
+        """Opens the index and reconciles it if the log directory changed or the last reconcile is too old."""
+        self.open()
+        mtime, now = self._directory_state(), time.monotonic()
+        with self._lock:
+            if mtime == self._directory_mtime and now - self._reconciled_at < self.reconcile_seconds: return
+            # Claimed before reconciling, so concurrent reads do not all reconcile at once.
+            self._directory_mtime, self._reconciled_at = mtime, now
+        self.reconcile()
+
+    def rebuild(self) -> int:
+        with transaction() as conn:
+            conn.execute("DELETE FROM submission_index")
+            conn.execute("DELETE FROM submission_sources")
+        return self.reconcile()
+
+    def reconcile(self) -> int:
+        """Brings every user's rows up to date with their files. Returns the number of rows added."""
+        sources = {row["username"]: row for row in connect().execute("SELECT * FROM submission_sources")}
+        added = 0
+        for username in self.log.usernames():
+            source = sources.get(username)
+            if source is None or self._behind(username, source): added += self.catch_up(username)
+        return added
+
+    def _log_state(self, username: str) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self.log.log_path(username))
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_ino, stat.st_size
+
+    def _behind(self, username: str, source) -> bool:
+        # Size against size: a torn or half-written last line keeps the parsed offset short of the size.
+        return self._log_state(username) != (source["log_inode"], source["log_size"]) or \
+            self._legacy_signature(username) != source["legacy_signature"]
+
+    def _legacy_signature(self, username: str) -> str:
+        try:
+            stat = os.stat(self.log.legacy_path(username))
+        except FileNotFoundError:
+            return ""
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def catch_up(self, username: str) -> int:
+        """
+        Indexes the user's log from where the index left off. A replaced log
+        (compaction) or a changed legacy file re-indexes the user from scratch.
+        Returns the number of rows added.
+        """
+        with transaction() as conn:
+            source = conn.execute("SELECT * FROM submission_sources WHERE username = ?", (username,)).fetchone()
+            legacy_signature = self._legacy_signature(username)
+            # Taken before reading, so anything appended meanwhile leaves the stored size behind the file's.
+            observed_inode, observed_size = self._log_state(username)
+            offset, inode = (source["log_offset"], source["log_inode"]) if source else (0, 0)
+            # Reading a replaced log from the old offset would start mid-line.
+            records, end, current_inode = self.log.read_from(username, offset) if inode == observed_inode else ([], 0, -1)
+            if source is None or current_inode != inode or end < offset or legacy_signature != source["legacy_signature"]:
+                conn.execute("DELETE FROM submission_index WHERE username = ?", (username,))
+                records, end, current_inode = self.log.read_from(username, 0)
+                records = [(None, record) for record in self.log.read_legacy(username)] + records
+                first = 0
+            else:
+                first = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM submission_index WHERE username = ?", (username,)).fetchone()[0]
+            # Positions follow the order of read(): legacy records first, then the log.
+            rows = [_row(username, record, first + i, log_offset) for i, (log_offset, record) in enumerate(records)]
+            conn.executemany("INSERT INTO submission_index (username, subject, level, status, timestamp, position, log_offset) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO submission_sources (username, log_inode, log_offset, legacy_signature, log_size) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (username, current_inode, end, legacy_signature, observed_size if current_inode == observed_inode else -1))
+        return len(rows)
+
+    def record(self, username: str, _submission: Dict) -> None:
+        self.catch_up(username)
+
+    def aggregated(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """subject -> level -> [{username, status, timestamp}], newest first."""
+        self.refresh()
+        aggregated: Dict[str, Dict[str, List[Dict]]] = {}
+        rows = connect().execute(
+            f"SELECT username, subject, level, status, timestamp FROM submission_index WHERE {LISTED} ORDER BY subject, level, timestamp DESC, id DESC")
+        for row in rows:
+            aggregated.setdefault(row["subject"], {}).setdefault(row["level"], []).append(
+                {"username": row["username"], "status": row["status"], "timestamp": row["timestamp"] or None})
+        return aggregated
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """subject -> level -> number of submissions, straight from the (subject, level) index."""
+        self.refresh()
+        summary: Dict[str, Dict[str, int]] = {}
+        for row in connect().execute(f"SELECT subject, level, COUNT(*) AS count FROM submission_index WHERE {LISTED} GROUP BY subject, level"):
+            summary.setdefault(row["subject"], {})[row["level"]] = row["count"]
+        return summary
+
+    def page(self, subject: Optional[str] = None, level: Optional[str] = None, status: Optional[str] = None,
+             since: Optional[str] = None, until: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+        """
+        One page of submissions matching the filters, newest first. Pass the
+        returned `nextCursor` back to continue; it is None on the last page.
+        """
+        self.refresh()
+        clauses, params = [LISTED], []
+        for column, value in (("subject", subject), ("level", level), ("status", status)):
+            if value:
+                clauses.append(f"{column} = ?"); params.append(value)
+        if since: clauses.append("timestamp >= ?"); params.append(since)
+        if until: clauses.append("timestamp < ?"); params.append(until)
+        if cursor:
+            timestamp, row_id = decode_cursor(cursor, 2)
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))"); params += [timestamp, timestamp, row_id]
+        limit = page_size(limit)
+        where = f"WHERE {' AND '.join(clauses)}"
+        rows = connect().execute(
+            f"SELECT id, username, subject, level, status, timestamp FROM submission_index {where} "
+            f"ORDER BY timestamp DESC, id DESC LIMIT ?", params + [limit + 1]).fetchall()
+        items = [{"username": r["username"], "subject": r["subject"], "level": r["level"],
+                  "status": r["status"], "timestamp": r["timestamp"] or None} for r in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1]["timestamp"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        return {"items": items, "nextCursor": next_cursor}
+
+    def user_page(self, username: str, fields: Optional[List[str]] = None, since: Optional[str] = None, descending: bool = False,
+                  limit: Optional[int] = None, cursor: Optional[str] = None) -> Optional[Dict]:
+        """
+        One page of a user's submissions ordered by timestamp (ties in log
+        order), each projected to `fields` if given. `since` keeps submissions
+        at or after that ISO timestamp. The page is chosen in the index and
+        only its records are read from the log. Returns None for an unknown user.
+        """
+        self.open()
+        if not self.log.log_path(username).exists() and not self.log.legacy_path(username).exists(): return None
+        clauses, params = ["username = ?"], [username]
+        if since: clauses.append("timestamp >= ?"); params.append(since)
+        if cursor:
+            timestamp, position = decode_cursor(cursor, 2)
+            op = "<" if descending else ">"
+            clauses.append(f"(timestamp {op} ? OR (timestamp = ? AND position {op} ?))"); params += [timestamp, timestamp, position]
+        limit = page_size(limit)
+        direction = "DESC" if descending else "ASC"
+        for _attempt in range(3):
+            self.catch_up(username)
+            with snapshot() as conn:
+                inode = conn.execute("SELECT log_inode FROM submission_sources WHERE username = ?", (username,)).fetchone()[0]
+                rows = conn.execute(
+                    f"SELECT timestamp, position, log_offset FROM submission_index WHERE {' AND '.join(clauses)} "
+                    f"ORDER BY timestamp {direction}, position {direction} LIMIT ?", params + [limit + 1]).fetchall()
+            page = rows[:limit]
+            logged = self.log.read_at(username, [row["log_offset"] for row in page if row["log_offset"] is not None], inode)
+            if logged is not None: break  # Otherwise the log was compacted meanwhile: index it again.
+        else:
+            raise RuntimeError(f"The submission log of {username} kept changing while it was read.")
+        legacy = self.log.read_legacy(username) if any(row["log_offset"] is None for row in page) else []
+        submissions = [legacy[row["position"]] if row["log_offset"] is None else logged[row["log_offset"]] for row in page]
+        items = [{field: sub.get(field) for field in fields} if fields else sub for sub in submissions]
+        next_cursor = encode_cursor(page[-1]["timestamp"], page[-1]["position"]) if len(rows) > limit else None
+        return {"items": items, "nextCursor": next_cursor}
+
+
+SUBMISSION_INDEX = SubmissionIndex()
+
+
+if __name__ == "__main__":
+    # python -m utils.submission_index rebuild
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m utils.submission_index rebuild")
+        sys.exit(1)
+    connect().executescript(SCHEMA)
+    print(f"Indexed {SUBMISSION_INDEX.rebuild()} submissions.")
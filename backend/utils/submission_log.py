@@ -0,0 +1,239 @@
+# backend/utils/submission_log.py
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: compaction must not run while the server is up.
+    fcntl = None
+
+# --- Configuration ---
+SUBMISSIONS_PATH = Path(__file__).resolve().parent.parent / "data" / "submissions"
+SUBMISSION_FSYNC_MS = int(os.getenv("SUBMISSION_FSYNC_MS", "5"))
+
+
+def _lock(fd: int) -> None:
+    if fcntl: fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+class SubmissionLog:
+    """
+    Append-only submission history: one JSON record per line in
+    data/submissions/<username>.jsonl. Submissions written by older versions
+    as a JSON array in <username>.json are read first, so no migration is
+    needed; `compact()` folds them into the log.
+
+    append() returns once the record is on disk. Writers only append and
+    flush; a background thread fsyncs every dirty file once per
+    `fsync_ms` window, so a burst of submits costs one fsync per file
+    rather than one per request.
+    """
+
+    def __init__(self, base_path: Path = SUBMISSIONS_PATH, fsync_ms: int = SUBMISSION_FSYNC_MS):
+        self.base_path = base_path
+        self.fsync_interval = fsync_ms / 1000
+        self._cond = threading.Condition()
+        self._dirty = set()
+        self._written = 0
+        self._synced = 0
+        self._thread = None
+        self._listeners: List[Callable[[str, Dict], None]] = []
+
+    def subscribe(self, listener: Callable[[str, Dict], None]) -> None:
+        """Calls `listener(username, submission)` after every durable append."""
+        self._listeners.append(listener)
+
+    # --- Paths ---
+
+    def log_path(self, username: str) -> Path:
+        return self.base_path / f"{username}.jsonl"
+
+    def legacy_path(self, username: str) -> Path:
+        return self.base_path / f"{username}.json"
+
+    def usernames(self) -> List[str]:
+        if not self.base_path.exists(): return []
+        return sorted({p.stem for p in self.base_path.iterdir() if p.suffix in (".json", ".jsonl") and p.is_file()})
+
+    # --- Reads ---
+
+    def read(self, username: str) -> Optional[List[Dict]]:
+        """Returns the user's submissions oldest first, or None if they have never submitted."""
+        legacy, log = self.legacy_path(username), self.log_path(username)
+        if not legacy.exists() and not log.exists(): return None
+        return self._read_legacy(legacy) + self._read_log(log)
+
+    def read_legacy(self, username: str) -> List[Dict]:
+        """Submissions stored by older versions in <username>.json."""
+        return self._read_legacy(self.legacy_path(username))
+
+    def read_from(self, username: str, offset: int = 0) -> Tuple[List[Tuple[int, Dict]], int, int]:
+        """
+        (byte offset, record) for each record of the .jsonl log that starts at
+        `offset` or later, up to the last complete line. Returns (records,
+        offset after them, inode of the log); the inode changes when
+        compact() replaces the file.
+        """
+        path = self.log_path(username)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return [], 0, 0
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # A torn last line is left for the next append to terminate.
+        records, position = [], 0
+        for line in data[:end].splitlines(keepends=True):
+            if line.strip():
+                try:
+                    records.append((offset + position, json.loads(line)))
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping unreadable line at byte {offset + position} in {path}")
+            position += len(line)
+        return records, offset + end, inode
+
+    def read_at(self, username: str, offsets: List[int], inode: int) -> Optional[Dict[int, Dict]]:
+        """The records starting at the given byte offsets of the log, or None if the log is no longer file `inode`."""
+        if not offsets: return {}
+        try:
+            f = open(self.log_path(username), 'rb')
+        except FileNotFoundError:
+            return None
+        records = {}
+        with f:
+            if os.fstat(f.fileno()).st_ino != inode: return None
+            for offset in offsets:
+                f.seek(offset)
+                records[offset] = json.loads(f.readline())
+        return records
+
+    def iter_all(self) -> Iterator[Tuple[str, Dict]]:
+        """Yields (username, submission) for every stored submission."""
+        for username in self.usernames():
+            for submission in self.read(username) or []:
+                yield username, submission
+
+    def _read_legacy(self, path: Path) -> List[Dict]:
+        if not path.exists() or path.stat().st_size == 0: return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except json.JSONDecodeError:
+            print(f"Warning: Skipping malformed JSON file {path}")
+            return []
+
+    def _read_log(self, path: Path) -> List[Dict]:
+        if not path.exists(): return []
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip(): continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Only a crash mid-append can leave a partial line; the rest of the log is intact.
+                    print(f"Warning: Skipping unreadable line {line_no} in {path}")
+        return records
+
+    # --- Writes ---
+
+    def append(self, username: str, submission: Dict) -> None:
+        line = (json.dumps(submission, ensure_ascii=False) + "\n").encode('utf-8')
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        path = self.log_path(username)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                _lock(fd)
+                # compact() may have replaced the file while we waited for the lock.
+                if fcntl and os.fstat(fd).st_ino != os.stat(path).st_ino: continue
+                os.write(fd, self._terminate_torn_line(fd) + line)
+            finally:
+                os.close(fd)
+            break
+        with self._cond:
+            self._written += 1
+            ticket = self._written
+            self._dirty.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sync_loop, name="submission-fsync", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            while self._synced < ticket: self._cond.wait()
+        for listener in self._listeners:
+            try:
+                listener(username, submission)
+            except Exception as e:
+                print(f"Submission listener failed for {username}: {e}")
+
+    @staticmethod
+    def _terminate_torn_line(fd: int) -> bytes:
+        """
+        A crash mid-append can leave a last line without its newline; a record
+        written straight after it would be glued to it and skipped as
+        unreadable. Returns the newline that ends it, or b"" if the log is clean.
+        """
+        if os.fstat(fd).st_size == 0: return b""
+        os.lseek(fd, -1, os.SEEK_END)
+        return b"" if os.read(fd, 1) == b"\n" else b"\n"
+
+    def _sync_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._dirty: self._cond.wait()
+            time.sleep(self.fsync_interval)
+            with self._cond:
+                dirty, self._dirty = self._dirty, set()
+                ticket = self._written
+            for path in dirty:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                    try: os.fsync(fd)
+                    finally: os.close(fd)
+                except OSError as e:
+                    print(f"Warning: fsync of {path} failed: {e}")
+            with self._cond:
+                self._synced = ticket
+                self._cond.notify_all()
+
+    # --- Maintenance ---
+
+    def compact(self, username: str) -> int:
+        """
+        Rewrites a user's history as a single clean log: legacy JSON records
+        are folded in and unreadable lines dropped. Returns the record count.
+        """
+        path, legacy = self.log_path(username), self.legacy_path(username)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _lock(fd)
+            records = self._read_legacy(legacy) + self._read_log(path)
+            tmp = path.with_suffix(".jsonl.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for record in records: f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush(); os.fsync(f.fileno())
+            os.replace(tmp, path)
+            if legacy.exists(): legacy.unlink()
+        finally:
+            os.close(fd)
+        return len(records)
+
+
+SUBMISSION_LOG = SubmissionLog()
+
+
+if __name__ == "__main__":
+    # python -m utils.submission_log compact [username ...]
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        print("usage: python -m utils.submission_log compact [username ...]")
+        sys.exit(1)
+    for name in sys.argv[2:] or SUBMISSION_LOG.usernames():
+        print(f"{name}: {SUBMISSION_LOG.compact(name)} submissions")
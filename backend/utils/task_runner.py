@@ -0,0 +1,214 @@
+# backend/utils/task_runner.py
+
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from utils.db import connect, transaction
+
+# --- Configuration ---
+TASK_RETENTION_SECONDS = 24 * 3600
+PROGRESS_WRITE_SECONDS = 1.0
+# Parse processes run at lower CPU priority than the web workers and kernels.
+PARSE_NICENESS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    state TEXT NOT NULL,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    rows_total INTEGER,
+    errors TEXT NOT NULL DEFAULT '[]',
+    warnings TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    owner_pid INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+"""
+
+FINAL_STATES = ("done", "failed")
+
+
+def _parse_in_child(subject: str, path: str, conn) -> None:
+    """Entry point of the parse process: sends ('progress', done, total) messages, then ('result', questions) or ('error', message)."""
+    try:
+        os.nice(PARSE_NICENESS)
+    except OSError:
+        pass
+    try:
+        from utils.question_parsers import PARSERS
+        last = [0.0]
+
+        def progress(done: int, total: Optional[int]) -> None:
+            now = time.monotonic()
+            if now - last[0] >= PROGRESS_WRITE_SECONDS / 2 or done == total:
+                last[0] = now
+                conn.send(("progress", done, total))
+
+        conn.send(("result", PARSERS[subject](path, progress)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+
+class UploadTaskRunner:
+    """
+    Processes question uploads in the background. The request only saves the
+    file and enqueues it; a single runner thread then parses each workbook in
+    a separate low-priority process, so neither the GIL nor the CPU is taken
+    from the threads serving students, validates the result and publishes it
+    through the question store. Task state lives in the application database,
+    so any worker can answer a status request.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _open(self) -> None:
+        # Caller holds the lock.
+        if self._ready: return
+        connect().executescript(SCHEMA)
+        with transaction() as conn:
+            # Tasks whose worker process is gone (e.g. a restart) will never finish.
+            for row in conn.execute("SELECT id, owner_pid FROM upload_tasks WHERE state NOT IN ('done', 'failed')").fetchall():
+                if not self._alive(row["owner_pid"]):
+                    conn.execute("UPDATE upload_tasks SET state = 'failed', errors = ?, finished_at = ? WHERE id = ?",
+                                 (json.dumps(["Interrupted: the server restarted before the upload finished."]), time.time(), row["id"]))
+        self._ready = True
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def submit(self, subject: str, level: str, path: Path, filename: str, remove_missing: bool) -> Dict:
+        """
+        Queues an upload saved at `path`, inside a directory the runner owns
+        and deletes when the task ends. Returns the task's status.
+        """
+        task_id = uuid.uuid4().hex
+        with self._lock:
+            self._open()
+            with transaction() as conn:
+                conn.execute("DELETE FROM upload_tasks WHERE finished_at < ?", (time.time() - TASK_RETENTION_SECONDS,))
+                conn.execute("INSERT INTO upload_tasks (id, kind, subject, level, filename, state, owner_pid, created_at) "
+                             "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                             (task_id, "replace" if remove_missing else "merge", subject, str(level), filename, os.getpid(), time.time()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="upload-task-runner", daemon=True)
+                self._thread.start()
+        self._queue.put((task_id, subject, str(level), path, remove_missing))
+        return self.get(task_id)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        with self._lock: self._open()
+        row = connect().execute("SELECT * FROM upload_tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None: return None
+        status = {
+            "taskId": row["id"], "state": row["state"], "mode": row["kind"], "subject": row["subject"], "level": row["level"],
+            "filename": row["filename"], "rowsProcessed": row["rows_done"], "rowsTotal": row["rows_total"],
+            "errors": json.loads(row["errors"]), "warnings": json.loads(row["warnings"]),
+            "createdAt": _iso(row["created_at"]), "startedAt": _iso(row["started_at"]), "finishedAt": _iso(row["finished_at"]),
+            "etaSeconds": None,
+        }
+        if row["result"]: status["result"] = json.loads(row["result"])
+        if row["state"] == "parsing" and row["rows_total"] and row["rows_done"]:
+            elapsed = time.time() - row["started_at"]
+            status["etaSeconds"] = round(elapsed / row["rows_done"] * max(row["rows_total"] - row["rows_done"], 0), 1)
+        return status
+
+    def _update(self, task_id: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with transaction() as conn:
+            conn.execute(f"UPDATE upload_tasks SET {assignments} WHERE id = ?", (*fields.values(), task_id))
+
+    def _work(self) -> None:
+        while True:
+            task_id, subject, level, path, remove_missing = self._queue.get()
+            try:
+                self._run(task_id, subject, level, path, remove_missing)
+            except Exception as e:
+                print(f"Upload task {task_id} failed: {e}")
+                self._update(task_id, state="failed", errors=json.dumps([str(e)]), finished_at=time.time())
+            finally:
+                shutil.rmtree(Path(path).parent, ignore_errors=True)
+
+    def _run(self, task_id: str, subject: str, level: str, path: Path, remove_missing: bool) -> None:
+        from utils.audio_cache import register_question_audio
+        from utils.dataset_cache import register_question_datasets
+        from utils.question_parsers import validate_questions
+        from utils.question_store import QUESTION_STORE
+        from utils.solution_fingerprint import register_question_solutions
+
+        self._update(task_id, state="parsing", started_at=time.time())
+        context = multiprocessing.get_context("spawn")  # The server process holds kernel sockets and threads.
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_parse_in_child, args=(subject, str(path), sender), name=f"parse-{task_id[:8]}", daemon=True)
+        process.start()
+        sender.close()
+        outcome = None
+        try:
+            while outcome is None:
+                try:
+                    message = receiver.recv()
+                except EOFError:
+                    outcome = ("error", f"The parser process exited unexpectedly (code {process.exitcode}).")
+                    break
+                if message[0] == "progress":
+                    self._update(task_id, rows_done=message[1], rows_total=message[2])
+                else:
+                    outcome = message
+        finally:
+            receiver.close()
+            process.join()
+
+        if outcome[0] == "error":
+            self._update(task_id, state="failed", errors=json.dumps([outcome[1]]), finished_at=time.time())
+            return
+        questions = outcome[1]
+        self._update(task_id, state="publishing", warnings=json.dumps(validate_questions(subject, questions)))
+        try:
+            counts = QUESTION_STORE.upsert(subject, level, questions, remove_missing=remove_missing)
+        except ValueError as e:
+            self._update(task_id, state="failed", errors=json.dumps([str(e)]), finished_at=time.time())
+            return
+        try:
+            # Students load datasets through load_dataset()/load_audio() and grading reads the solution
+            # fingerprints; building them now keeps the first load and the first grade fast.
+            cached = len(register_question_datasets(questions)) + len(register_question_audio(questions))
+            fingerprinted = len(register_question_solutions(questions))
+        except Exception as e:
+            print(f"Upload task {task_id}: dataset cache or solution fingerprints not built: {e}")
+            cached = fingerprinted = 0
+        self._update(task_id, state="done", result=json.dumps({"questions": len(questions), "datasetsCached": cached,
+                                                                "solutionsFingerprinted": fingerprinted, **counts}),
+                     finished_at=time.time())
+
+
+UPLOAD_TASKS = UploadTaskRunner()
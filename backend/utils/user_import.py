@@ -0,0 +1,86 @@
+# backend/utils/user_import.py
+
+import csv
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Callable, Dict, List, Optional
+import bcrypt
+from utils import user_store
+
+# --- Configuration ---
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 2)))
+IMPORT_BATCH_ROWS = 256
+# Rosters smaller than this are hashed in-process; starting workers would cost more than it saves.
+MIN_PARALLEL_ROWS = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _hash_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process holds kernel sockets and threads.
+            _pool = ProcessPoolExecutor(max_workers=BCRYPT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _hash_all(passwords: List[str]) -> List[str]:
+    if len(passwords) < MIN_PARALLEL_ROWS or BCRYPT_WORKERS < 2:
+        return [_hash_password(p) for p in passwords]
+    return list(_hash_pool().map(_hash_password, passwords, chunksize=max(1, len(passwords) // (BCRYPT_WORKERS * 4))))
+
+
+def import_roster(binary_stream: IO[bytes], initial_progress: Dict, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Creates users from a username,password[,role] CSV upload. Rows are read
+    from the stream in batches and each batch's passwords are hashed on the
+    process pool; students all start from `initial_progress`. Everything is
+    written in one transaction at the end. Returns the counts, which are also
+    passed to `on_progress` after every batch.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline=""))
+    existing = user_store.usernames()
+    counts = {"rows": 0, "hashed": 0, "created": 0, "skipped": 0}
+    new_users: List[Dict] = []
+    started = time.perf_counter()
+
+    def flush(batch: List[Dict]) -> None:
+        for user, hashed in zip(batch, _hash_all([user["password"] for user in batch])):
+            user["password"] = hashed
+        new_users.extend(batch)
+        counts["hashed"] += len(batch)
+        if on_progress: on_progress(dict(counts))
+        if counts["rows"] >= IMPORT_BATCH_ROWS:
+            print(f"User import: {counts['hashed']} passwords hashed, {counts['skipped']} rows skipped "
+                  f"({time.perf_counter() - started:.1f}s).")
+
+    batch: List[Dict] = []
+    for row in reader:
+        counts["rows"] += 1
+        username, password, role = row.get('username'), row.get('password'), row.get('role') or 'student'
+        if not username or not password or username in existing:
+            counts["skipped"] += 1
+            continue
+        existing.add(username)
+        batch.append({"username": username, "password": password, "role": role,
+                      "progress": initial_progress if role == 'student' else {}})
+        if len(batch) >= IMPORT_BATCH_ROWS:
+            flush(batch)
+            batch = []
+    if batch: flush(batch)
+
+    # One transaction for the whole roster; a name taken concurrently is skipped, not overwritten.
+    created, raced = user_store.add_users(new_users)
+    counts["created"], counts["skipped"] = created, counts["skipped"] + raced
+    if on_progress: on_progress(dict(counts))
+    return counts
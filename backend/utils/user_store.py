@@ -0,0 +1,358 @@
+# backend/utils/user_store.py
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.db import connect, snapshot, transaction
+from utils.paging import decode_cursor, encode_cursor, page_size, parse_sort
+
+# --- Configuration ---
+USERS_FILE_PATH = Path(__file__).resolve().parent.parent / "data" / "users.json"
+PROGRESS_COMMIT_MS = int(os.getenv("PROGRESS_COMMIT_MS", "10"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'student'
+);
+CREATE TABLE IF NOT EXISTS progress (
+    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (username, subject, level)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def _db():
+    """Returns a connection, creating the schema and importing users.json on first use."""
+    global _ready
+    if not _ready:
+        with _ready_lock:
+            if not _ready:
+                connect().executescript(SCHEMA)
+                _migrate()
+                _import_once()
+                _ready = True
+    return connect()
+
+
+def _migrate() -> None:
+    conn = connect()
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(users)")}
+    if "updated_at" not in columns:
+        # Rows that predate the column report an empty updated_at and never match `since`.
+        conn.execute("ALTER TABLE users ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
+    conn.execute("CREATE INDEX IF NOT EXISTS users_updated_at ON users (updated_at, username)")
+    conn.execute("CREATE INDEX IF NOT EXISTS users_role ON users (role, username)")
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _touch(conn, usernames: Iterable[str]) -> None:
+    now = _now()
+    conn.executemany("UPDATE users SET updated_at = ? WHERE username = ?", [(now, username) for username in usernames])
+
+
+def _import_once() -> None:
+    # The first start after the switch seeds the store from the legacy file.
+    conn = connect()
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'users_imported'").fetchone(): return
+    if USERS_FILE_PATH.exists():
+        count, _skipped = _add_users(_read_json(USERS_FILE_PATH))
+        print(f"Imported {count} users from {USERS_FILE_PATH} into the user store.")
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('users_imported', ?)", (str(USERS_FILE_PATH),))
+
+
+def _progress_for(conn, usernames: Optional[List[str]] = None) -> Dict[str, Dict[str, Dict[str, str]]]:
+    # Rows come back in insertion order, which keeps subjects and levels in the order they were added.
+    if usernames is None:
+        rows = conn.execute("SELECT username, subject, level, status FROM progress ORDER BY rowid")
+    else:
+        marks = ",".join("?" * len(usernames))
+        rows = conn.execute(f"SELECT username, subject, level, status FROM progress WHERE username IN ({marks}) ORDER BY rowid", usernames)
+    progress: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for row in rows:
+        progress.setdefault(row["username"], {}).setdefault(row["subject"], {})[row["level"]] = row["status"]
+    return progress
+
+
+def _to_dict(row, progress: Dict, with_password: bool) -> Dict:
+    user = {"username": row["username"]}
+    if with_password: user["password"] = row["password"]
+    user["role"] = row["role"]
+    user["progress"] = progress.get(row["username"], {})
+    return user
+
+
+def _insert_progress(conn, username: str, progress: Dict[str, Dict[str, str]]) -> None:
+    conn.executemany(
+        "INSERT INTO progress (username, subject, level, status) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (username, subject, level) DO UPDATE SET status = excluded.status",
+        [(username, subject, level, status) for subject, levels in (progress or {}).items() for level, status in levels.items()])
+
+
+# --- Reads ---
+
+def get_user(username: str, with_password: bool = False) -> Optional[Dict]:
+    conn = _db()
+    row = conn.execute("SELECT username, password, role FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None: return None
+    return _to_dict(row, _progress_for(conn, [username]), with_password)
+
+
+def list_users(with_password: bool = False) -> List[Dict]:
+    conn = _db()
+    progress = _progress_for(conn)
+    return [_to_dict(row, progress, with_password) for row in conn.execute("SELECT username, password, role FROM users ORDER BY rowid")]
+
+
+# Public field name -> column. `progress` is assembled from the progress table.
+USER_FIELDS = {"username": "username", "role": "role", "updatedAt": "updated_at", "progress": None}
+USER_SORTS = ("username", "role", "updatedAt")
+
+
+def page_users(fields: Optional[List[str]] = None, since: Optional[str] = None, sort: Optional[str] = None,
+               limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+    """
+    One page of users without password hashes, ordered by `sort` ('-' for
+    descending, ties broken by username). `fields` limits the keys of each
+    item; `since` keeps users changed at or after that ISO timestamp.
+    Returns {items, nextCursor, syncedAt}; pass syncedAt as the next `since`.
+
+    syncedAt is the newest updated_at committed when the first page was
+    read, and later pages carry it forward in the cursor. Writers stamp
+    updated_at inside their write transaction, and those are serialized, so
+    anything committed after that read is stamped at or after syncedAt.
+    """
+    conn = _db()
+    fields = fields or list(USER_FIELDS)
+    sort_field, descending = parse_sort(sort, USER_SORTS, "username")
+    column = USER_FIELDS[sort_field]
+    clauses, params = [], []
+    if since: clauses.append("updated_at >= ?"); params.append(since)
+    synced_at = None
+    if cursor:
+        value, username, synced_at = decode_cursor(cursor, 3)
+        op = "<" if descending else ">"
+        clauses.append(f"({column} {op} ? OR ({column} = ? AND username {op} ?))"); params += [value, value, username]
+    limit = page_size(limit)
+    direction = "DESC" if descending else "ASC"
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with snapshot():
+        if synced_at is None:
+            synced_at = conn.execute("SELECT MAX(updated_at) FROM users").fetchone()[0] or since or ""
+        rows = conn.execute(
+            f"SELECT username, role, updated_at FROM users {where} ORDER BY {column} {direction}, username {direction} LIMIT ?",
+            params + [limit + 1]).fetchall()
+        page = rows[:limit]
+        progress = _progress_for(conn, [row["username"] for row in page]) if "progress" in fields and page else {}
+    items = []
+    for row in page:
+        item = {}
+        for field in fields:
+            item[field] = progress.get(row["username"], {}) if field == "progress" else row[USER_FIELDS[field]]
+        items.append(item)
+    next_cursor = encode_cursor(page[-1][column], page[-1]["username"], synced_at) if len(rows) > limit else None
+    return {"items": items, "nextCursor": next_cursor, "syncedAt": synced_at}
+
+
+def usernames() -> set:
+    return {row[0] for row in _db().execute("SELECT username FROM users")}
+
+
+# --- Writes ---
+
+def add_users(users: Iterable[Dict]) -> Tuple[int, int]:
+    """Inserts new users with their progress in one transaction. Returns (created, skipped) - existing usernames are skipped."""
+    _db()
+    return _add_users(users)
+
+
+def _add_users(users: Iterable[Dict]) -> Tuple[int, int]:
+    created = skipped = 0
+    with transaction() as conn:
+        for user in users:
+            cursor = conn.execute("INSERT OR IGNORE INTO users (username, password, role, updated_at) VALUES (?, ?, ?, ?)",
+                                  (user["username"], user["password"], user.get("role", "student"), _now()))
+            if not cursor.rowcount:
+                skipped += 1
+                continue
+            _insert_progress(conn, user["username"], user.get("progress"))
+            created += 1
+    return created, skipped
+
+
+def unlock_first_levels(username: str) -> List[str]:
+    """Unlocks level1 of every subject in the user's progress where it is missing or locked. Returns those subjects."""
+    rows = _db().execute(
+        "SELECT p.subject, l1.status FROM (SELECT subject, MIN(rowid) AS first FROM progress WHERE username = ? GROUP BY subject) p "
+        "LEFT JOIN progress l1 ON l1.username = ? AND l1.subject = p.subject AND l1.level = 'level1' ORDER BY p.first",
+        (username, username)).fetchall()
+    subjects = [row["subject"] for row in rows if row["status"] in (None, "locked")]
+    if subjects:
+        # Only a login that actually changes something takes the write lock.
+        with transaction() as conn:
+            _insert_progress(conn, username, {subject: {"level1": "unlocked"} for subject in subjects})
+            _touch(conn, [username])
+    return subjects
+
+
+def complete_level(username: str, subject: str, level) -> Optional[Dict]:
+    """
+    Marks level<N> completed and unlocks level<N+1> if it is locked. Returns
+    the updated user without the password hash, or None for an unknown user.
+    Returns only after the change is committed; see ProgressWriter.
+    """
+    _db()
+    return PROGRESS_WRITER.complete_level(username, subject, level)
+
+
+def _complete_level(conn, username: str, subject: str, level_name: str, next_level_name: str) -> bool:
+    if not conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone(): return False
+    _insert_progress(conn, username, {subject: {level_name: "completed"}})
+    conn.execute("UPDATE progress SET status = 'unlocked' WHERE username = ? AND subject = ? AND level = ? AND status = 'locked'",
+                 (username, subject, next_level_name))
+    _touch(conn, [username])
+    return True
+
+
+class _ProgressUpdate:
+    __slots__ = ("args", "done", "found", "error")
+
+    def __init__(self, args: Tuple):
+        self.args = args
+        self.done = threading.Event()
+        self.found = False
+        self.error: Optional[BaseException] = None
+
+
+class ProgressWriter:
+    """
+    Group commit for level completions. Callers queue an update and block;
+    a single writer thread waits `window_ms` for more to arrive, applies
+    everything queued in one transaction (each update in its own savepoint,
+    so one bad update cannot sink the rest) and then acknowledges each
+    caller. When a whole class submits at once this is one commit per
+    window instead of one per student.
+    """
+
+    def __init__(self, window_ms: int = PROGRESS_COMMIT_MS):
+        self.window = window_ms / 1000
+        self._cond = threading.Condition()
+        self._pending: List[_ProgressUpdate] = []
+        self._thread = None
+        self.commits = 0
+        self.updates = 0
+
+    def complete_level(self, username: str, subject: str, level) -> Optional[Dict]:
+        update = _ProgressUpdate((username, subject, f"level{level}", f"level{int(level) + 1}"))
+        with self._cond:
+            self._pending.append(update)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        update.done.wait()
+        if update.error: raise update.error
+        return get_user(username) if update.found else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending: self._cond.wait()
+            time.sleep(self.window)
+            with self._cond: batch, self._pending = self._pending, []
+            try:
+                with transaction() as conn:
+                    for update in batch:
+                        conn.execute("SAVEPOINT progress_update")
+                        try:
+                            update.found = _complete_level(conn, *update.args)
+                            conn.execute("RELEASE progress_update")
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO progress_update"); conn.execute("RELEASE progress_update")
+                            update.error = e
+                self.commits += 1
+                self.updates += len(batch)
+            except Exception as e:
+                print(f"Progress commit of {len(batch)} update(s) failed: {e}")
+                for update in batch: update.error = update.error or e
+            for update in batch: update.done.set()
+
+
+PROGRESS_WRITER = ProgressWriter()
+
+
+def add_subject_for_all(subject: str, num_levels: int) -> None:
+    """Gives every user who does not have `subject` yet its levels, with level1 unlocked."""
+    _db()
+    with transaction() as conn:
+        missing = [row[0] for row in conn.execute(
+            "SELECT username FROM users WHERE username NOT IN (SELECT username FROM progress WHERE subject = ?) ORDER BY rowid", (subject,))]
+        levels = {f"level{i}": "unlocked" if i == 1 else "locked" for i in range(1, num_levels + 1)}
+        for username in missing: _insert_progress(conn, username, {subject: levels})
+        _touch(conn, missing)
+
+
+def add_locked_level(subject: str, level_name: str) -> None:
+    """Adds a locked level to every student who is enrolled in `subject`."""
+    _db()
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO progress (username, subject, level, status) "
+            "SELECT DISTINCT p.username, p.subject, ?, 'locked' FROM progress p JOIN users u ON u.username = p.username "
+            "WHERE p.subject = ? AND u.role = 'student' "
+            "ON CONFLICT (username, subject, level) DO UPDATE SET status = 'locked'",
+            (level_name, subject))
+        conn.execute("UPDATE users SET updated_at = ? WHERE role = 'student' AND username IN (SELECT username FROM progress WHERE subject = ?)",
+                     (_now(), subject))
+
+
+# --- Import / export ---
+
+def import_json(path: Path = USERS_FILE_PATH) -> int:
+    """Loads users from a users.json file, skipping usernames that already exist. Returns the number created."""
+    created, _skipped = add_users(_read_json(path))
+    return created
+
+
+def _read_json(path: Path) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        users = json.load(f).get("users", [])
+    return [u for u in users if u.get("username") and u.get("password")]
+
+
+def export_json(path: Path) -> int:
+    users = list_users(with_password=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"users": users}, f, indent=2)
+    return len(users)
+
+
+if __name__ == "__main__":
+    # python -m utils.user_store import [users.json] | export <users.json>
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "import":
+        print(f"Imported {import_json(Path(sys.argv[2]) if len(sys.argv) > 2 else USERS_FILE_PATH)} users.")
+    elif command == "export" and len(sys.argv) > 2:
+        print(f"Exported {export_json(Path(sys.argv[2]))} users.")
+    else:
+        print("usage: python -m utils.user_store import [users.json] | export <users.json>")
+        sys.exit(1)
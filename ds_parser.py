@@ -1,32 +1,8 @@
-import pandas as pd
-import json
+import sys
+from pathlib import Path
 
-# Load single-sheet Excel
-df = pd.read_excel("ds.xlsx")
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from utils.question_parsers import convert, parse_ds
 
-result = []
-
-# Group by question id
-for q_id, group in df.groupby("id"):
-    # Take first row for title & description
-    first_row = group.iloc[0]
-    
-    test_cases = []
-    for _, row in group.iterrows():
-        test_cases.append({
-            "input": str(row["input"]),
-            "output": str(row["output"])
-        })
-    
-    result.append({
-        "id": first_row["id"],
-        "title": first_row["title"],
-        "description": first_row["description"],
-        "test_cases": test_cases
-    })
-
-# Save JSON
-with open("ds_1.json", "w") as f:
-    json.dump(result, f, indent=2)
-
-print("✅ JSON file created successfully!")
+# Same parser the admin upload uses (backend/utils/question_parsers.py).
+convert(parse_ds, "ds.xlsx", "ds_1.json")
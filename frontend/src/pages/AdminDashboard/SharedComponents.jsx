@@ -354,8 +354,24 @@ export const FileUploader = ({
         method: "POST",
         body: formData,
       });
-      const data = await res.json();
+      let data = await res.json();
       if (!res.ok) throw new Error(data.message);
+      // Question uploads are processed in the background; follow the task until it finishes.
+      // The status URL comes only with the 202 response; the task payloads polled from it do not repeat it.
+      const statusUrl = res.status === 202 ? data.statusUrl : null;
+      while (statusUrl && !["done", "failed"].includes(data.state)) {
+        const progress = data.rowsTotal ? ` (${data.rowsProcessed}/${data.rowsTotal} rows)` : "";
+        setMessage({ type: "info", text: `Processing upload: ${data.state}${progress}...` });
+        const statusRes = await fetch(`${API_BASE_URL}${statusUrl}?wait=10`);
+        data = await statusRes.json();
+        if (!statusRes.ok) throw new Error(data.message);
+      }
+      if (data.state === "failed") throw new Error(data.errors.join(" ") || "Upload failed.");
+      if (data.state === "done") {
+        const { added, changed, removed } = data.result;
+        data.message = `Upload complete: ${added} added, ${changed} changed, ${removed} removed.`;
+        if (data.warnings.length) data.message += ` Warnings: ${data.warnings.slice(0, 3).join(" ")}`;
+      }
       setMessage({ type: "success", text: data.message });
       if (onUploadComplete) onUploadComplete();
     } catch (error) {
@@ -180,7 +180,11 @@ const StudentSubmissionDetail = ({ username, submissions }) => {
 
 const SubmissionsViewer = () => {
   const [view, setView] = useState("aggregate");
+  // subject -> level -> number of submissions; the rows of one level are fetched page by page.
   const [submissions, setSubmissions] = useState({});
+  const [levelSubmissions, setLevelSubmissions] = useState([]);
+  const [levelCursor, setLevelCursor] = useState(null);
+  const [isLevelLoading, setIsLevelLoading] = useState(false);
   const [subjects, setSubjects] = useState([]);
   const [selectedSubject, setSelectedSubject] = useState("");
   const [selectedLevel, setSelectedLevel] = useState("");
@@ -197,7 +201,7 @@ const SubmissionsViewer = () => {
         try {
           // --- CHANGE #1: Corrected the API endpoint ---
           // The endpoint for all submissions is /api/submissions, not /api/questions.
-          const res = await fetch(`${API_BASE_URL}/api/submissions`);
+          const res = await fetch(`${API_BASE_URL}/api/submissions?summary=1`);
           if (!res.ok) throw new Error("Failed to fetch submission data.");
           const data = await res.json();
           setSubmissions(data);
@@ -222,6 +226,29 @@ const SubmissionsViewer = () => {
     }
   }, [view]);
 
+  const fetchLevelSubmissions = async (cursor = null) => {
+    setIsLevelLoading(true);
+    try {
+      const params = new URLSearchParams({ subject: selectedSubject, level: selectedLevel, limit: "200" });
+      if (cursor) params.set("cursor", cursor);
+      const res = await fetch(`${API_BASE_URL}/api/submissions?${params}`);
+      if (!res.ok) throw new Error("Failed to fetch submission data.");
+      const data = await res.json();
+      setLevelSubmissions((prev) => (cursor ? [...prev, ...data.items] : data.items));
+      setLevelCursor(data.nextCursor);
+    } catch (error) {
+      console.error("Error fetching submissions for level", error);
+    } finally {
+      setIsLevelLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    setLevelSubmissions([]);
+    setLevelCursor(null);
+    if (view === "aggregate" && selectedSubject && selectedLevel) fetchLevelSubmissions();
+  }, [view, selectedSubject, selectedLevel]);
+
   const handleStudentSearch = async (e) => {
     e.preventDefault();
     if (!searchUsername) return;
@@ -258,11 +285,7 @@ const SubmissionsViewer = () => {
       .replace(/^./, (str) => str.toUpperCase()),
   }));
 
-  const displayedSubmissions =
-    (selectedSubject &&
-      selectedLevel &&
-      submissions[selectedSubject]?.[selectedLevel]) ||
-    [];
+  const displayedSubmissions = levelSubmissions;
 
   return (
     // ... (No changes needed in the JSX return part) ...
@@ -431,6 +454,13 @@ const SubmissionsViewer = () => {
                     </tbody>
                   </table>
                 </div>
+                {levelCursor && (
+                  <div className="flex justify-center mt-4">
+                    <Button onClick={() => fetchLevelSubmissions(levelCursor)} variant="outline" disabled={isLevelLoading}>
+                      {isLevelLoading ? "Loading..." : "Load more"}
+                    </Button>
+                  </div>
+                )}
               </>
             )}
           </div>
@@ -8,6 +8,7 @@ import ReactMarkdown from "react-markdown";
 import UserProfileModal from "../../components/UserProfileModal/UserProfileModal";
 import userpng from "../../assets/userPS.png";
 import { useFullScreenExamSecurity } from "../../hooks/useFullScreenExamSecurity";
+import { runEvaluationJob } from "./evaluationJobs";
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
 
@@ -255,9 +256,9 @@ const SpeechRecognition_ExamPage = () => {
     const useDefaultInput = !isCustomInputEnabled[partId];
     const userInput = useDefaultInput ? "" : customInputs[partId] || "";
     try {
-      const res = await fetch(`${API_BASE_URL}/api/evaluate/run`, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ sessionId, cellCode, userInput, username: user.username, subject, level, questionId: currentPart.taskId, partId: currentPart.part_id, }), });
+      const res = await runEvaluationJob("run", { sessionId, cellCode, userInput, username: user.username, subject, level, questionId: currentPart.taskId, partId: currentPart.part_id, });
       if (!res.ok) throw new Error(`Server error on run: ${res.status}`);
-      const result = await res.json();
+      const result = res.data;
       setCellResults((prev) => ({ ...prev, [partId]: { stdout: result.stdout, stderr: result.stderr, test_results: null, }, }));
       if (!result.stderr && validationStatus[partId] === undefined) { setValidationStatus((prev) => ({ ...prev, [partId]: false })); }
     } catch (error) {
@@ -275,9 +276,9 @@ const SpeechRecognition_ExamPage = () => {
     if (!currentPart) { setIsExecuting(false); return; }
     const cellCode = allCode[partId] || "pass";
     try {
-      const res = await fetch(`${API_BASE_URL}/api/evaluate/validate`, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ sessionId, username: user.username, subject, level, questionId: currentPart.taskId, partId: currentPart.part_id, cellCode, }), });
+      const res = await runEvaluationJob("validate", { sessionId, username: user.username, subject, level, questionId: currentPart.taskId, partId: currentPart.part_id, cellCode, });
       if (!res.ok) throw new Error(`Server error: ${res.status}`);
-      const data = await res.json();
+      const data = res.data;
       setCellResults((prev) => ({ ...prev, [partId]: data }));
       const allPassed = data.test_results && data.test_results.length > 0 && data.test_results.every(p => p === true);
       setValidationStatus((prev) => ({ ...prev, [partId]: allPassed }));
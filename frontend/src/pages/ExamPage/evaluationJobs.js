@@ -0,0 +1,29 @@
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+
+// Long-poll interval for a queued job; the server caps a single wait at 30 seconds.
+const JOB_WAIT_SECONDS = 25;
+
+/**
+ * Submits /api/evaluate/run or /api/evaluate/validate as a background job and
+ * polls until it finishes, so no server request thread is held for the length
+ * of the execution. Resolves to { ok, status, data } with the job's own result
+ * and HTTP status; requests rejected before queueing are returned as they are.
+ */
+export async function runEvaluationJob(kind, body) {
+  const res = await fetch(`${API_BASE_URL}/api/evaluate/${kind}?async=1`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  let data = await res.json();
+  if (res.status !== 202 || !data.jobId) return { ok: res.ok, status: res.status, data };
+
+  const jobId = data.jobId;
+  while (data.status === "queued" || data.status === "running") {
+    const poll = await fetch(`${API_BASE_URL}/api/evaluate/jobs/${jobId}?wait=${JOB_WAIT_SECONDS}`);
+    data = await poll.json();
+    if (!poll.ok) return { ok: false, status: poll.status, data };
+  }
+  if (data.status === "failed") return { ok: false, status: 500, data: { error: data.error } };
+  return { ok: data.httpStatus < 400, status: data.httpStatus, data: data.result };
+}